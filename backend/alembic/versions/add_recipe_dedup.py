@@ -0,0 +1,49 @@
+"""add MinHash signatures, LSH bands and recipe aliases
+
+Revision ID: add_recipe_dedup_rev1
+Revises: add_session_ttl_indexes_rev1
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_recipe_dedup_rev1'
+down_revision = 'add_session_ttl_indexes_rev1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing recipes are indexed by app.services.dedup.backfill_signatures
+    # when the scraper pipeline next opens
+    op.add_column('recipes', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+
+    op.create_table(
+        'recipe_lsh_bands',
+        sa.Column('band', sa.SmallInteger(), nullable=False),
+        sa.Column('bucket', sa.BigInteger(), nullable=False),
+        sa.Column('recipe_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('recipes.id', ondelete='CASCADE'), nullable=False),
+        sa.PrimaryKeyConstraint('band', 'bucket', 'recipe_id'),
+    )
+    op.create_index('ix_recipe_lsh_bands_recipe_id', 'recipe_lsh_bands', ['recipe_id'])
+
+    op.create_table(
+        'recipe_aliases',
+        sa.Column('source_url', sa.String(), primary_key=True),
+        sa.Column('recipe_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('recipes.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('similarity', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+    op.create_index('ix_recipe_aliases_recipe_id', 'recipe_aliases', ['recipe_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipe_aliases_recipe_id', table_name='recipe_aliases')
+    op.drop_table('recipe_aliases')
+    op.drop_index('ix_recipe_lsh_bands_recipe_id', table_name='recipe_lsh_bands')
+    op.drop_table('recipe_lsh_bands')
+    op.drop_column('recipes', 'minhash')
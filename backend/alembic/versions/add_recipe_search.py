@@ -0,0 +1,53 @@
+"""add recipe search columns and indexes
+
+Revision ID: add_recipe_search_rev1
+Revises: add_session_preferences_rev1
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_recipe_search_rev1'
+down_revision = 'add_session_preferences_rev1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('recipes', sa.Column('ingredient_names', postgresql.ARRAY(sa.Text()), server_default='{}'))
+    op.add_column('recipes', sa.Column('search_vector', postgresql.TSVECTOR()))
+
+    # Backfill existing recipes (same expression as app.services.search)
+    op.execute("""
+        UPDATE recipes r SET
+            ingredient_names = COALESCE(
+                (SELECT array_agg(DISTINCT lower(regexp_replace(btrim(k), '\\s+', ' ', 'g'))) FROM json_object_keys(r.ingredients) k),
+                '{}'
+            ),
+            search_vector =
+                setweight(to_tsvector('english', r.title), 'A') ||
+                setweight(to_tsvector('english',
+                    COALESCE((SELECT string_agg(k, ' ') FROM json_object_keys(r.ingredients) k), '') || ' ' ||
+                    COALESCE((SELECT string_agg(t.name, ' ') FROM tags t WHERE t.id = ANY(r.tag_ids)), '')
+                ), 'B') ||
+                setweight(to_tsvector('english', array_to_string(r.steps, ' ')), 'C')
+    """)
+
+    op.create_index('ix_recipes_search_vector', 'recipes', ['search_vector'], postgresql_using='gin')
+    op.create_index(
+        'ix_recipes_title_trgm', 'recipes', ['title'],
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipes_title_trgm', table_name='recipes')
+    op.drop_index('ix_recipes_search_vector', table_name='recipes')
+    op.drop_column('recipes', 'search_vector')
+    op.drop_column('recipes', 'ingredient_names')
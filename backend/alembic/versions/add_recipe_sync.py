@@ -0,0 +1,94 @@
+"""add recipe sync versions and tombstones
+
+Revision ID: add_recipe_sync_rev1
+Revises: add_swipe_popularity_rev1
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_recipe_sync_rev1'
+down_revision = 'add_swipe_popularity_rev1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # One sequence orders recipe changes and deletions together (see app.services.catalog_sync)
+    op.execute("CREATE SEQUENCE recipe_sync_version_seq")
+    op.add_column('recipes', sa.Column('sync_version', sa.BigInteger()))
+    op.execute("""
+        UPDATE recipes r SET sync_version = v.version
+        FROM (SELECT id, nextval('recipe_sync_version_seq') AS version FROM recipes ORDER BY last_updated, id) v
+        WHERE r.id = v.id
+    """)
+    op.create_index('ix_recipes_sync_version', 'recipes', ['sync_version'])
+
+    op.create_table(
+        'recipe_tombstones',
+        sa.Column('recipe_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('sync_version', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index('ix_recipe_tombstones_sync_version', 'recipe_tombstones', ['sync_version'])
+
+    # Only changes to what clients see bump the version; search, dedup and
+    # other derived columns are left alone. The timestamp is taken with the
+    # version, not at transaction start, so it says when the change was made.
+    op.execute("""
+        CREATE FUNCTION recipes_sync_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND (
+                NEW.title, NEW.ingredients::text, NEW.steps, NEW.source_url, NEW.images,
+                NEW.total_time, NEW.servings, NEW.tag_ids, NEW.hash
+            ) IS NOT DISTINCT FROM (
+                OLD.title, OLD.ingredients::text, OLD.steps, OLD.source_url, OLD.images,
+                OLD.total_time, OLD.servings, OLD.tag_ids, OLD.hash
+            ) THEN
+                NEW.sync_version := OLD.sync_version;
+                RETURN NEW;
+            END IF;
+            NEW.sync_version := nextval('recipe_sync_version_seq');
+            NEW.last_updated := clock_timestamp();
+            IF TG_OP = 'INSERT' THEN
+                DELETE FROM recipe_tombstones WHERE recipe_id = NEW.id;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER recipes_sync_version BEFORE INSERT OR UPDATE ON recipes
+        FOR EACH ROW EXECUTE FUNCTION recipes_sync_version()
+    """)
+    op.execute("""
+        CREATE FUNCTION recipes_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO recipe_tombstones (recipe_id, sync_version, deleted_at)
+            VALUES (OLD.id, nextval('recipe_sync_version_seq'), clock_timestamp())
+            ON CONFLICT (recipe_id) DO UPDATE SET
+                sync_version = EXCLUDED.sync_version, deleted_at = EXCLUDED.deleted_at;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER recipes_tombstone AFTER DELETE ON recipes
+        FOR EACH ROW EXECUTE FUNCTION recipes_tombstone()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER recipes_tombstone ON recipes")
+    op.execute("DROP FUNCTION recipes_tombstone()")
+    op.execute("DROP TRIGGER recipes_sync_version ON recipes")
+    op.execute("DROP FUNCTION recipes_sync_version()")
+    op.drop_index('ix_recipe_tombstones_sync_version', table_name='recipe_tombstones')
+    op.drop_table('recipe_tombstones')
+    op.drop_index('ix_recipes_sync_version', table_name='recipes')
+    op.drop_column('recipes', 'sync_version')
+    op.execute("DROP SEQUENCE recipe_sync_version_seq")
@@ -0,0 +1,63 @@
+"""pack swipe session tag weights
+
+Revision ID: add_session_preferences_rev1
+Revises: add_tag_vocabulary_rev1
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import struct
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_session_preferences_rev1'
+down_revision = 'add_tag_vocabulary_rev1'
+branch_labels = None
+depends_on = None
+
+# Must match app.services.preferences
+MAX_TRACKED_TAGS = 64
+HEADER = struct.Struct("<dH")
+
+
+def upgrade() -> None:
+    op.add_column('swipe_sessions', sa.Column('preferences', sa.LargeBinary(), nullable=True))
+
+    # Pack existing weights (scale 1.0), keeping the strongest tags only
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, tag_weight_ids, tag_weight_values FROM swipe_sessions WHERE tag_weight_ids <> '{}'"
+    ))
+    for session_id, tag_ids, values in rows.fetchall():
+        weights = sorted(zip(tag_ids, values), key=lambda item: abs(item[1]), reverse=True)
+        weights = sorted(weights[:MAX_TRACKED_TAGS])
+        count = len(weights)
+        packed = HEADER.pack(1.0, count) + struct.pack(
+            f"<{count}i{count}f", *(tag_id for tag_id, _ in weights), *(value for _, value in weights)
+        )
+        conn.execute(
+            sa.text("UPDATE swipe_sessions SET preferences = :packed WHERE id = :id"),
+            {"packed": packed, "id": session_id}
+        )
+
+    op.drop_column('swipe_sessions', 'tag_weight_values')
+    op.drop_column('swipe_sessions', 'tag_weight_ids')
+
+
+def downgrade() -> None:
+    op.add_column('swipe_sessions', sa.Column('tag_weight_ids', postgresql.ARRAY(sa.Integer()), server_default='{}'))
+    op.add_column('swipe_sessions', sa.Column('tag_weight_values', postgresql.ARRAY(sa.Float()), server_default='{}'))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, preferences FROM swipe_sessions WHERE preferences IS NOT NULL"))
+    for session_id, packed in rows.fetchall():
+        scale, count = HEADER.unpack_from(packed)
+        unpacked = struct.unpack_from(f"<{count}i{count}f", packed, HEADER.size)
+        conn.execute(
+            sa.text("UPDATE swipe_sessions SET tag_weight_ids = :ids, tag_weight_values = :values WHERE id = :id"),
+            {"ids": list(unpacked[:count]), "values": [v / scale for v in unpacked[count:]], "id": session_id}
+        )
+
+    op.drop_column('swipe_sessions', 'preferences')
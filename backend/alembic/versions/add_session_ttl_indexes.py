@@ -0,0 +1,25 @@
+"""index session last_updated for TTL expiry
+
+Revision ID: add_session_ttl_indexes_rev1
+Revises: add_recipe_search_rev1
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_session_ttl_indexes_rev1'
+down_revision = 'add_recipe_search_rev1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_swipe_sessions_last_updated', 'swipe_sessions', ['last_updated'])
+    op.create_index('ix_cooking_sessions_last_updated', 'cooking_sessions', ['last_updated'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cooking_sessions_last_updated', table_name='cooking_sessions')
+    op.drop_index('ix_swipe_sessions_last_updated', table_name='swipe_sessions')
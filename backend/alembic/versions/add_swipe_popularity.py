@@ -0,0 +1,55 @@
+"""add swipe events and materialized popularity totals
+
+Revision ID: add_swipe_popularity_rev1
+Revises: add_recipe_dedup_rev1
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_swipe_popularity_rev1'
+down_revision = 'add_recipe_dedup_rev1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'swipe_events',
+        sa.Column('id', sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column('session_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('recipe_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('liked', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+
+    op.create_table(
+        'recipe_popularity',
+        sa.Column('recipe_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('recipes.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('likes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('swipes', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'tag_popularity',
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('likes', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('swipes', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'popularity_state',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('last_event_id', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+    op.execute("INSERT INTO popularity_state (id, last_event_id) VALUES (1, 0)")
+
+
+def downgrade() -> None:
+    op.drop_table('popularity_state')
+    op.drop_table('tag_popularity')
+    op.drop_table('recipe_popularity')
+    op.drop_table('swipe_events')
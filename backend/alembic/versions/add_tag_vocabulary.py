@@ -0,0 +1,112 @@
+"""add tag vocabulary
+
+Revision ID: add_tag_vocabulary_rev1
+Revises: add_servings_column_rev1
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_tag_vocabulary_rev1'
+down_revision = 'add_servings_column_rev1'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.services.tag_vocabulary.TAG_SYNONYMS as of this revision
+TAG_SYNONYMS = {
+    "bbq": "barbecue",
+    "barbeque": "barbecue",
+    "desserts": "dessert",
+    "appetizers": "appetizer",
+    "side dishes": "side dish",
+    "main dishes": "main dish",
+    "soups": "soup",
+    "salads": "salad",
+    "cookies": "cookie",
+    "veggie": "vegetarian",
+    "gluten free": "gluten-free",
+    "dairy free": "dairy-free",
+}
+
+
+def normalized(column: str) -> str:
+    """SQL for normalize_tag(column): collapse whitespace, lowercase, strip " .,;:", apply synonyms."""
+    base = f"btrim(lower(regexp_replace(btrim({column}), '\\s+', ' ', 'g')), ' .,;:')"
+    synonyms = ", ".join(f"('{name}', '{canonical}')" for name, canonical in TAG_SYNONYMS.items())
+    return f"COALESCE((SELECT s.canonical FROM (VALUES {synonyms}) AS s(name, canonical) WHERE s.name = {base}), {base})"
+
+
+def upgrade() -> None:
+    # Tag dictionary
+    op.create_table(
+        'tags',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False, unique=True),
+    )
+    op.execute(f"""
+        INSERT INTO tags (name)
+        SELECT DISTINCT name FROM (
+            SELECT {normalized('t')} AS name
+            FROM recipes, unnest(recipes.tags) AS t
+        ) normalized_tags
+        WHERE name <> ''
+        ORDER BY 1
+    """)
+
+    # Recipes reference tag ids instead of tag text
+    op.add_column('recipes', sa.Column('tag_ids', postgresql.ARRAY(sa.Integer()), server_default='{}'))
+    op.execute(f"""
+        UPDATE recipes r SET tag_ids = COALESCE((
+            SELECT array_agg(DISTINCT tags.id ORDER BY tags.id)
+            FROM unnest(r.tags) AS t
+            JOIN tags ON tags.name = {normalized('t')}
+        ), '{{}}')
+    """)
+    op.drop_column('recipes', 'tags')
+
+    # Session weights become parallel id/value arrays
+    op.add_column('swipe_sessions', sa.Column('tag_weight_ids', postgresql.ARRAY(sa.Integer()), server_default='{}'))
+    op.add_column('swipe_sessions', sa.Column('tag_weight_values', postgresql.ARRAY(sa.Float()), server_default='{}'))
+    op.execute(f"""
+        UPDATE swipe_sessions s SET tag_weight_ids = w.ids, tag_weight_values = w.vals
+        FROM (
+            SELECT session_id, array_agg(tag_id ORDER BY tag_id) AS ids, array_agg(weight ORDER BY tag_id) AS vals
+            FROM (
+                SELECT s2.id AS session_id, tags.id AS tag_id, sum(kv.value::float) AS weight
+                FROM swipe_sessions s2, json_each_text(s2.tag_weights) AS kv
+                JOIN tags ON tags.name = {normalized('kv.key')}
+                GROUP BY s2.id, tags.id
+            ) per_tag
+            GROUP BY session_id
+        ) w
+        WHERE s.id = w.session_id
+    """)
+    op.drop_column('swipe_sessions', 'tag_weights')
+
+
+def downgrade() -> None:
+    op.add_column('swipe_sessions', sa.Column('tag_weights', sa.JSON()))
+    op.execute("""
+        UPDATE swipe_sessions s SET tag_weights = COALESCE((
+            SELECT json_object_agg(tags.name, w.value)
+            FROM unnest(s.tag_weight_ids, s.tag_weight_values) AS w(tag_id, value)
+            JOIN tags ON tags.id = w.tag_id
+        ), '{}'::json)
+    """)
+    op.drop_column('swipe_sessions', 'tag_weight_values')
+    op.drop_column('swipe_sessions', 'tag_weight_ids')
+
+    op.add_column('recipes', sa.Column('tags', postgresql.ARRAY(sa.String())))
+    op.execute("""
+        UPDATE recipes r SET tags = COALESCE((
+            SELECT array_agg(tags.name ORDER BY tags.name)
+            FROM unnest(r.tag_ids) AS t(id)
+            JOIN tags ON tags.id = t.id
+        ), '{}')
+    """)
+    op.drop_column('recipes', 'tag_ids')
+    op.drop_table('tags')
@@ -0,0 +1,54 @@
+"""let writers re-stamp a recipe's sync version
+
+An UPDATE that sets `sync_version` itself now always takes a fresh version
+and timestamp, even when no visible column changed. Bulk writers use it to
+stamp their rows just before committing (see app.services.catalog_snapshot).
+
+Revision ID: allow_recipe_restamp_rev1
+Revises: clear_empty_signatures_rev1
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'allow_recipe_restamp_rev1'
+down_revision = 'clear_empty_signatures_rev1'
+branch_labels = None
+depends_on = None
+
+
+def _sync_version_function(restamp: bool) -> str:
+    restamp_check = "AND NEW.sync_version IS NOT DISTINCT FROM OLD.sync_version" if restamp else ""
+    return f"""
+        CREATE OR REPLACE FUNCTION recipes_sync_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND (
+                NEW.title, NEW.ingredients::text, NEW.steps, NEW.source_url, NEW.images,
+                NEW.total_time, NEW.servings, NEW.tag_ids, NEW.hash
+            ) IS NOT DISTINCT FROM (
+                OLD.title, OLD.ingredients::text, OLD.steps, OLD.source_url, OLD.images,
+                OLD.total_time, OLD.servings, OLD.tag_ids, OLD.hash
+            ) {restamp_check} THEN
+                NEW.sync_version := OLD.sync_version;
+                RETURN NEW;
+            END IF;
+            NEW.sync_version := nextval('recipe_sync_version_seq');
+            NEW.last_updated := clock_timestamp();
+            IF TG_OP = 'INSERT' THEN
+                DELETE FROM recipe_tombstones WHERE recipe_id = NEW.id;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """
+
+
+def upgrade() -> None:
+    op.execute(_sync_version_function(restamp=True))
+
+
+def downgrade() -> None:
+    op.execute(_sync_version_function(restamp=False))
@@ -1,7 +1,7 @@
 """restructuring
 
 Revision ID: cafaa49323d4
-Revises: 
+Revises: initial_schema_rev1
 Create Date: 2025-01-29 17:54:17.690010
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = 'cafaa49323d4'
-down_revision = None
+down_revision = 'initial_schema_rev1'
 branch_labels = None
 depends_on = None
 
@@ -0,0 +1,37 @@
+"""clear MinHash signatures of recipes without shingles
+
+Recipes with no ingredient or step words used to get an all-0xFFFFFFFF
+signature, which made every such recipe a duplicate of the others. They now
+have an empty signature and no LSH buckets (see app.services.dedup).
+
+Revision ID: clear_empty_signatures_rev1
+Revises: add_recipe_sync_rev1
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'clear_empty_signatures_rev1'
+down_revision = 'add_recipe_sync_rev1'
+branch_labels = None
+depends_on = None
+
+# NUM_PERMUTATIONS uint32 values, all 0xFFFFFFFF
+EMPTY_SIGNATURE = "decode(repeat('ff', 128 * 4), 'hex')"
+
+
+def upgrade() -> None:
+    op.execute(f"""
+        DELETE FROM recipe_lsh_bands WHERE recipe_id IN (
+            SELECT id FROM recipes WHERE minhash = {EMPTY_SIGNATURE}
+        )
+    """)
+    op.execute(f"UPDATE recipes SET minhash = '' WHERE minhash = {EMPTY_SIGNATURE}")
+
+
+def downgrade() -> None:
+    # Recomputed (as before this revision) by dedup.backfill_signatures
+    op.execute("UPDATE recipes SET minhash = NULL WHERE minhash = ''")
@@ -0,0 +1,69 @@
+"""initial schema
+
+Creates the tables as they were before the first migration, so a new
+database is built with `alembic upgrade head` alone. Databases created
+earlier by `Base.metadata.create_all` already have them: stamp those at the
+revision matching their columns instead of upgrading through this one.
+
+Revision ID: initial_schema_rev1
+Revises: 
+Create Date: 2025-01-29 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'initial_schema_rev1'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # servings is added by add_servings_column
+    op.create_table(
+        'recipes',
+        sa.Column('id', sa.UUID(), primary_key=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('ingredients', sa.JSON(), nullable=False),
+        sa.Column('steps', postgresql.ARRAY(sa.Text()), nullable=False),
+        sa.Column('source_url', sa.String()),
+        sa.Column('images', postgresql.ARRAY(sa.String())),
+        sa.Column('total_time', sa.Integer(), nullable=True),
+        sa.Column('tags', postgresql.ARRAY(sa.String())),
+        sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('hash', sa.String(64)),
+    )
+    op.create_table(
+        'saved_recipes',
+        sa.Column('id', sa.UUID(), primary_key=True),
+        sa.Column('recipe_id', sa.UUID(), sa.ForeignKey('recipes.id'), nullable=False),
+        sa.Column('saved_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        'swipe_sessions',
+        sa.Column('id', sa.UUID(), primary_key=True),
+        sa.Column('tag_weights', sa.JSON()),
+        sa.Column('seen_recipes', postgresql.ARRAY(sa.UUID())),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        'cooking_sessions',
+        sa.Column('id', sa.UUID(), primary_key=True),
+        sa.Column('recipe_id', sa.UUID(), sa.ForeignKey('recipes.id'), nullable=False),
+        sa.Column('current_step', sa.Integer()),
+        sa.Column('conversation_history', sa.JSON()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('last_updated', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('cooking_sessions')
+    op.drop_table('swipe_sessions')
+    op.drop_table('saved_recipes')
+    op.drop_table('recipes')
@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.metrics import registry
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The work runs in its own task, so a caller that is cancelled (e.g. its
+    client disconnected) does not cancel it for the other callers sharing it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def start(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """The in-flight task for `key`, starting `factory()` if there is none."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return task
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.shield(self.start(key, factory))
+
+
+def _label(priority: int) -> str:
+    return priority.name.lower() if hasattr(priority, "name") else str(priority)
+
+
+class AdmissionRejected(Exception):
+    """Raised when work is shed; `status_code` is 429 (queue full) or 503 (waited too long)."""
+
+    def __init__(self, status_code: int, retry_after: int):
+        super().__init__(f"Rejected with {status_code}, retry after {retry_after}s")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a priority queue in front of it.
+
+    At most `max_concurrency` callers run at once. Others wait in priority
+    order (lower number first, FIFO within a priority) as long as fewer than
+    `queue_limits[priority]` of that priority are already waiting, and for at
+    most `timeout` seconds; otherwise they are rejected immediately, so an
+    overloaded dependency sheds its least important work first instead of
+    piling up awaits.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, queue_limits: Dict[int, int], timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_limits = queue_limits
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: list = []  # heap of (priority, sequence, future)
+        self._waiting: Dict[int, int] = {priority: 0 for priority in queue_limits}
+        self._sequence = 0
+        self._service_time = 1.0  # moving average, for Retry-After
+
+        self._queue_depth = registry.gauge(f"{name}_queue_depth", f"Callers waiting for {name} admission, by priority")
+        self._in_flight_gauge = registry.gauge(f"{name}_in_flight", f"Callers currently admitted to {name}")
+        self._admissions = registry.counter(f"{name}_admissions_total", f"{name} admission decisions, by priority and outcome")
+        self._wait = registry.histogram(f"{name}_queue_wait_seconds", f"Time spent waiting for {name} admission")
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < self.max_concurrency and not any(self._waiting.values())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from queue length and recent service time."""
+        backlog = sum(self._waiting.values()) / max(self.max_concurrency, 1) + 1
+        return max(1, math.ceil(backlog * self._service_time))
+
+    def _update_gauges(self) -> None:
+        for priority, waiting in self._waiting.items():
+            self._queue_depth.set(waiting, priority=_label(priority))
+        self._in_flight_gauge.set(self.in_flight)
+
+    def _reject(self, priority: int, status_code: int, outcome: str) -> AdmissionRejected:
+        self._admissions.inc(priority=_label(priority), outcome=outcome)
+        return AdmissionRejected(status_code, self.retry_after())
+
+    async def _acquire(self, priority: int) -> None:
+        # Drop waiters that already gave up
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self._admissions.inc(priority=_label(priority), outcome="admitted")
+            self._update_gauges()
+            return
+        if self._waiting[priority] >= self.queue_limits[priority]:
+            raise self._reject(priority, 429, "rejected")
+
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._waiters, (priority, self._sequence, future))
+        self._waiting[priority] += 1
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            # Not wait_for: it swallows a cancellation that lands just after the
+            # slot is granted, so the cancelled request would run anyway
+            await asyncio.wait((future,), timeout=self.timeout)
+            if not future.done():
+                future.cancel()
+                raise self._reject(priority, 503, "timed_out")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a slot just as we gave up: hand it on
+                self._release()
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._waiting[priority] -= 1
+            self._wait.observe(time.perf_counter() - start)
+            self._update_gauges()
+        self._admissions.inc(priority=_label(priority), outcome="admitted")
+
+    def _release(self) -> None:
+        # Hand the slot straight to the most important live waiter
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                self._update_gauges()
+                return
+        self.in_flight -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def admit(self, priority: int):
+        await self._acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.perf_counter() - start)
+            self._release()
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     # Database settings
@@ -8,14 +9,81 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: str
+    # Optional read replica (same credentials); read-only handlers use it while it keeps up
+    POSTGRES_REPLICA_HOST: Optional[str] = None
+    POSTGRES_REPLICA_PORT: Optional[str] = None
+    REPLICA_MAX_LAG_SECONDS: float = 2.0
+    REPLICA_LAG_CHECK_SECONDS: float = 1.0
+    # Bounds how long a request waits on an unreachable replica before using the primary
+    REPLICA_CONNECT_TIMEOUT_SECONDS: int = 2
+    # How long reads of something this worker just wrote stay on the primary
+    READ_YOUR_WRITES_SECONDS: float = 5.0
     
     # OpenAI settings
     OPENAI_API_KEY: str
 
+    # Logging settings
+    LOG_LEVEL: str = "INFO"
+
+    # Swipe session store settings (bounds on what a crash can lose)
+    SESSION_FLUSH_INTERVAL_SECONDS: float = 5.0
+    SESSION_MAX_DIRTY: int = 500
+    SESSION_CACHE_SIZE: int = 10000
+
+    # Session expiry (sessions idle longer than their TTL are deleted in batches)
+    SWIPE_SESSION_TTL_SECONDS: float = 7 * 24 * 3600
+    COOKING_SESSION_TTL_SECONDS: float = 2 * 24 * 3600
+    SESSION_REAPER_INTERVAL_SECONDS: float = 300.0
+    SESSION_REAPER_BATCH_SIZE: int = 1000
+
+    # Recommendation settings
+    CATALOG_REFRESH_SECONDS: float = 60.0
+    # How strongly /next favours recipes similar to the last liked one (0 disables)
+    SIMILARITY_BOOST: float = 2.0
+    # Popularity priors from all users' swipes, faded out over a session's first swipes (0 disables)
+    POPULARITY_PRIOR_STRENGTH: float = 1.0
+    POPULARITY_PRIOR_FADE_SWIPES: int = 20
+    POPULARITY_REFRESH_SECONDS: float = 60.0
+    # Only swipe events at least this old are aggregated (longer than any session flush transaction)
+    POPULARITY_SETTLE_SECONDS: float = 30.0
+    # Shared by all workers on a host; each maps the published snapshot read-only
+    CATALOG_DIR: str = "/tmp/little-chef-catalog"
+
+    # Image proxy settings (recipe responses keep source URLs unless a base URL is set)
+    IMAGE_CACHE_DIR: str = "/tmp/little-chef-images"
+    IMAGE_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+    IMAGE_FETCH_TIMEOUT_SECONDS: float = 10.0
+    IMAGE_PROXY_BASE_URL: Optional[str] = None
+
+    # Cooking assistant settings (step analyses are cached by step text)
+    STEP_ANALYSIS_CACHE_SIZE: int = 5000
+    STEP_PREFETCH_DEPTH: int = 2
+    # AI admission control, per worker (excess work is shed with 429/503)
+    AI_MAX_CONCURRENCY: int = 16
+    AI_MAX_QUEUE: int = 64
+    AI_QUEUE_TIMEOUT_SECONDS: float = 10.0
+
+    # Response settings (fast JSON skips response validation for trusted DB rows)
+    FAST_JSON_RESPONSES: bool = False
+    COMPRESSION_MIN_BYTES: int = 1024
+    # Delta sync only serves changes at least this old (longer than any recipe write
+    # transaction plus REPLICA_MAX_LAG_SECONDS)
+    SYNC_SETTLE_SECONDS: float = 5.0
+
+    # Admin settings (admin endpoints are disabled unless a token is set)
+    ADMIN_TOKEN: Optional[str] = None
+
     @property
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def REPLICA_DATABASE_URL(self) -> Optional[str]:
+        if not self.POSTGRES_REPLICA_HOST:
+            return None
+        port = self.POSTGRES_REPLICA_PORT or self.POSTGRES_PORT
+        return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_REPLICA_HOST}:{port}/{self.POSTGRES_DB}"
+
     class Config:
         env_file = ".env"
 
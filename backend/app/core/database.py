@@ -1,17 +1,183 @@
-from sqlalchemy import create_engine
+"""
+Database engines and request sessions, with reads routed to a replica.
+
+Handlers that write use `get_db` (the primary). Read-only handlers use
+`read_db(scope)` / `get_read_db`, which hand out a replica session when a
+replica is configured (POSTGRES_REPLICA_HOST), its replay lag is within
+REPLICA_MAX_LAG_SECONDS and nothing in the request's scope was written
+recently; otherwise they fall back to the primary. A replica session that
+cannot connect also falls back, and keeps reads off the replica until the
+next lag check.
+
+Read-your-writes: writers call `note_write(scope, key)`, and reads of that
+scope and key go to the primary for READ_YOUR_WRITES_SECONDS. The record is
+per process, which is enough for the sessions this guards, since those
+already stay pinned to one worker (see app.services.session_store).
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from .config import settings
+from .metrics import install_query_hooks, registry
+
+logger = logging.getLogger(__name__)
 
 engine = create_engine(settings.DATABASE_URL)
+install_query_hooks(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = create_engine(
+    settings.REPLICA_DATABASE_URL,
+    pool_pre_ping=True,
+    connect_args={"connect_timeout": settings.REPLICA_CONNECT_TIMEOUT_SECONDS},
+) if settings.REPLICA_DATABASE_URL else None
+if replica_engine is not None:
+    install_query_hooks(replica_engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+
 Base = declarative_base()
 
+READ_ROUTES = registry.counter("db_read_routes_total", "Read-only requests by database used and why")
+REPLICA_LAG = registry.gauge("db_replica_lag_seconds", "Replay lag of the read replica at the last check")
+
+# 0 on a primary (or a caught-up standby); otherwise the age of the last replayed transaction
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaRouter:
+    """Decides per request whether the replica may serve a read."""
+
+    def __init__(self):
+        self._lag: Optional[float] = None
+        self._checked_at = 0.0
+        self._reachable = True
+        self._checking = False
+        self._writes: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def note_write(self, scope: str, key="") -> None:
+        """Send reads of `scope`/`key` to the primary until the replica has surely caught up."""
+        if replica_engine is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._writes[(scope, str(key))] = now + settings.READ_YOUR_WRITES_SECONDS
+            if len(self._writes) > 10000:
+                self._writes = {entry: until for entry, until in self._writes.items() if until > now}
+
+    def _recently_written(self, scope: str, key: str) -> bool:
+        with self._lock:
+            until = self._writes.get((scope, key))
+            if until is not None and until <= time.monotonic():
+                del self._writes[(scope, key)]
+                until = None
+        return until is not None
+
+    def _replica_lag(self) -> Optional[float]:
+        """
+        Replica lag in seconds, checked at most every REPLICA_LAG_CHECK_SECONDS;
+        None if unreachable, or if the last check is stale and another request is rechecking.
+        """
+        with self._lock:
+            if time.monotonic() - self._checked_at < settings.REPLICA_LAG_CHECK_SECONDS:
+                return self._lag
+            if self._checking:
+                return None
+            self._checking = True
+        lag = None
+        try:
+            with replica_engine.connect() as connection:
+                lag = float(connection.execute(_LAG_SQL).scalar())
+            REPLICA_LAG.set(lag)
+            self._reachable = True
+        except Exception:
+            # Logged once per outage, not on every check
+            if self._reachable:
+                logger.exception("Read replica is unreachable; reading from the primary")
+            self._reachable = False
+        finally:
+            with self._lock:
+                self._lag = lag
+                self._checked_at = time.monotonic()
+                self._checking = False
+        return lag
+
+    def replica_failed(self) -> None:
+        """Keep reads on the primary until the next lag check, after a replica session failed to connect."""
+        if self._reachable:
+            logger.warning("Read replica connection failed; reading from the primary")
+        with self._lock:
+            self._reachable = False
+            self._lag = None
+            self._checked_at = time.monotonic()
+
+    def choose(self, scope: Optional[str], key: str = "") -> str:
+        """"replica" or the reason the primary has to serve this read."""
+        if replica_engine is None:
+            return "no_replica"
+        if scope is not None and self._recently_written(scope, key):
+            return "read_your_writes"
+        lag = self._replica_lag()
+        if lag is None:
+            return "replica_unavailable"
+        if lag > settings.REPLICA_MAX_LAG_SECONDS:
+            return "replica_lagging"
+        return "replica"
+
+
+router = ReplicaRouter()
+note_write = router.note_write
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def read_db(scope: Optional[str] = None, key_param: str = "session_id") -> Callable:
+    """
+    Dependency for read-only handlers. Reads of `scope` (keyed by the path
+    parameter `key_param`, if the route has one) see this worker's recent writes.
+    """
+    def dependency(request: Request):
+        route = router.choose(scope, str(request.path_params.get(key_param, "")))
+        db = None
+        if route == "replica":
+            db = ReplicaSessionLocal()
+            try:
+                # Connect now, while the primary can still take over
+                db.connection()
+            except OperationalError:
+                db.close()
+                db = None
+                router.replica_failed()
+                route = "replica_unavailable"
+        READ_ROUTES.inc(target="replica" if route == "replica" else "primary", reason=route)
+        if db is None:
+            db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+    return dependency
+
+
+# For reads of the recipe catalog, which only the scraper writes
+get_read_db = read_db()
@@ -0,0 +1,215 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, description: str, kind: str = "counter"):
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description, kind="gauge")
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    def __init__(self, name: str, description: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self._values: Dict[LabelKey, List[float]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, state in self._values.items():
+                cumulative = 0.0
+                for bound, count in zip(self.buckets, state):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {state[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {state[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._metrics.setdefault(name, Gauge(name, description))
+
+    def histogram(self, name: str, description: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, description, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram("http_request_duration_seconds", "HTTP request latency by route")
+REQUEST_COUNT = registry.counter("http_requests_total", "HTTP requests by route and status")
+DB_QUERY_COUNT = registry.counter("db_queries_total", "SQL statements executed, by route")
+DB_QUERY_DURATION = registry.histogram("db_query_duration_seconds", "Time spent in SQL per request, by route")
+SPAN_DURATION = registry.histogram("span_duration_seconds", "Duration of instrumented hot-path spans")
+
+
+class RequestStats:
+    """Per-request accumulator shared by the middleware, DB hooks and spans."""
+
+    __slots__ = ("query_count", "db_time", "spans")
+
+    def __init__(self):
+        self.query_count = 0
+        self.db_time = 0.0
+        self.spans: Dict[str, float] = {}
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """Time a block, recording it as a metric and in the current request's Server-Timing."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_DURATION.observe(elapsed, span=name)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.spans[name] = stats.spans.get(name, 0.0) + elapsed
+
+
+def install_query_hooks(engine) -> None:
+    """Count statements and DB time against whichever request is executing them."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.query_count += 1
+            stats.db_time += elapsed
+
+
+def _server_timing(stats: RequestStats, total: float) -> str:
+    entries = [
+        f"total;dur={total * 1000:.1f}",
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries"',
+    ]
+    for name, elapsed in stats.spans.items():
+        entries.append(f"{name.replace('.', '-')};dur={elapsed * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class InstrumentationMiddleware:
+    """ASGI middleware recording per-route latency and query counts, and adding a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(stats, time.perf_counter() - start).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_stats.reset(token)
+            route = scope.get("route")
+            labels = {
+                "method": scope["method"],
+                "route": getattr(route, "path", "unmatched"),
+            }
+            REQUEST_DURATION.observe(time.perf_counter() - start, **labels)
+            REQUEST_COUNT.inc(status=str(status), **labels)
+            DB_QUERY_COUNT.inc(stats.query_count, **labels)
+            DB_QUERY_DURATION.observe(stats.db_time, **labels)
@@ -0,0 +1,249 @@
+"""
+On-demand profiling of request handlers.
+
+Two modes are supported, both started and stopped at runtime through the admin
+router and both scoped to this worker process:
+
+- "sample": a background thread snapshots every thread's stack at a fixed
+  interval for the given duration, keeping only stacks that pass through a
+  handler in `app/routers`. Output is in the folded/collapsed format read by
+  flamegraph.pl and speedscope.
+- "cprofile": a sampled fraction of requests runs its handler under
+  cProfile; the results are merged into one pstats profile. Only one request
+  per process is captured at a time (a profiler hook is process-wide state);
+  sampled requests arriving meanwhile run unprofiled. Async handlers are
+  profiled only while they run, not while suspended at an `await`, so other
+  requests on the event loop are neither recorded nor slowed down.
+
+When no profiling session is active, handlers pay for a single attribute check.
+"""
+import asyncio
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from typing import Callable, Optional
+
+from fastapi.routing import APIRoute
+
+ROUTERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "routers")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class ProfilingSession:
+    def __init__(
+        self,
+        mode: str,
+        duration: float,
+        sample_rate: float = 1.0,
+        interval: float = 0.01,
+        route_prefix: Optional[str] = None,
+    ):
+        self.mode = mode
+        self.duration = duration
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.route_prefix = route_prefix
+        self.started_at = time.time()
+        self.ends_at = self.started_at + duration
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.profiled_requests = 0
+        self.skipped_requests = 0
+        self.stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        return not self._stopped.is_set() and time.time() < self.ends_at
+
+    def start(self) -> None:
+        if self.mode == "sample":
+            self._thread = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def _sample_loop(self) -> None:
+        own_ident = threading.get_ident()
+        while self.active:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                in_handler = False
+                while frame is not None:
+                    if frame.f_code.co_filename.startswith(ROUTERS_DIR):
+                        in_handler = True
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if in_handler:
+                    with self._lock:
+                        self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+            self._stopped.wait(self.interval)
+
+    def should_profile(self, path: str) -> bool:
+        if self.mode != "cprofile" or not self.active:
+            return False
+        if self.route_prefix and not path.startswith(self.route_prefix):
+            return False
+        return random.random() < self.sample_rate
+
+    def add_profile(self, profiler: cProfile.Profile) -> None:
+        with self._lock:
+            self.profiled_requests += 1
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+    def status(self) -> dict:
+        return {
+            "mode": self.mode,
+            "active": self.active,
+            "started_at": self.started_at,
+            "ends_at": self.ends_at,
+            "sample_rate": self.sample_rate,
+            "interval": self.interval,
+            "route_prefix": self.route_prefix,
+            "stack_samples": self.sample_count,
+            "distinct_stacks": len(self.samples),
+            "profiled_requests": self.profiled_requests,
+            "skipped_requests": self.skipped_requests,
+        }
+
+    def collapsed(self) -> str:
+        """Folded stacks (`frame;frame;frame count`), one per line."""
+        with self._lock:
+            samples = self.samples.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in samples)
+
+    def pstats_text(self, limit: int = 50) -> str:
+        if self.stats is None:
+            return ""
+        out = io.StringIO()
+        with self._lock:
+            self.stats.stream = out
+            self.stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def pstats_dump(self) -> bytes:
+        """Binary pstats data, loadable with pstats, snakeviz or flameprof."""
+        if self.stats is None:
+            return b""
+        with self._lock:
+            return marshal.dumps(self.stats.stats)
+
+
+_session: Optional[ProfilingSession] = None
+# Held while a request runs under cProfile
+_capture_lock = threading.Lock()
+
+
+def current_session() -> Optional[ProfilingSession]:
+    return _session
+
+
+def start_session(session: ProfilingSession) -> None:
+    global _session
+    if _session is not None:
+        _session.stop()
+    _session = session
+    session.start()
+
+
+def stop_session() -> Optional[ProfilingSession]:
+    if _session is not None:
+        _session.stop()
+    return _session
+
+
+class ProfiledRoute(APIRoute):
+    """APIRoute that can run its endpoint under cProfile while a cprofile session is active."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _wrap_endpoint(endpoint, path), **kwargs)
+
+
+def _begin_capture(session: ProfilingSession, path: str) -> bool:
+    """True if this request should run under cProfile; the caller must then release `_capture_lock`."""
+    if session is None or not session.should_profile(path):
+        return False
+    if not _capture_lock.acquire(blocking=False):
+        with session._lock:
+            session.skipped_requests += 1
+        return False
+    return True
+
+
+@types.coroutine
+def _profile_steps(coro, profiler: cProfile.Profile):
+    """Drive `coro`, with `profiler` enabled only while it is executing."""
+    value, error = None, None
+    while True:
+        profiler.enable()
+        try:
+            yielded = coro.throw(error) if error is not None else coro.send(value)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            profiler.disable()
+        try:
+            value, error = (yield yielded), None
+        except BaseException as e:
+            value, error = None, e
+
+
+def _wrap_endpoint(endpoint: Callable, path: str) -> Callable:
+    # include_router() rebuilds routes from the already wrapped endpoint
+    if getattr(endpoint, "__profiled__", False):
+        return endpoint
+
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            session = _session
+            if not _begin_capture(session, path):
+                return await endpoint(*args, **kwargs)
+            profiler = cProfile.Profile()
+            try:
+                return await _profile_steps(endpoint(*args, **kwargs), profiler)
+            finally:
+                _capture_lock.release()
+                session.add_profile(profiler)
+        async_wrapper.__profiled__ = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        session = _session
+        if not _begin_capture(session, path):
+            return endpoint(*args, **kwargs)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            profiler.disable()
+            _capture_lock.release()
+            session.add_profile(profiler)
+    sync_wrapper.__profiled__ = True
+    return sync_wrapper
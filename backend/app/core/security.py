@@ -0,0 +1,14 @@
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from .config import settings
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency guarding admin endpoints with the ADMIN_TOKEN setting."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -0,0 +1,124 @@
+"""
+Fast paths for serializing and compressing large JSON responses.
+
+`FastJSONResponse` renders with orjson, which handles UUIDs and datetimes
+natively. Routes that build their payload from trusted database rows can
+return `fast_json(payload)` when FAST_JSON_RESPONSES is enabled, which skips
+FastAPI's response_model validation and jsonable_encoder pass; the declared
+response_model still documents the shape.
+
+`CompressionMiddleware` compresses complete responses of at least
+COMPRESSION_MIN_BYTES with brotli or gzip, whichever the client prefers via
+Accept-Encoding. Streaming and already-compressed (image) responses pass through.
+"""
+import gzip
+from typing import Any, Optional
+
+import brotli
+import orjson
+from fastapi.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+
+BROTLI_QUALITY = 5  # much faster than the default 11, and still smaller than gzip
+GZIP_LEVEL = 6
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def fast_json(payload: Any) -> Any:
+    """Return `payload` pre-rendered with orjson when the fast path is enabled, else unchanged."""
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(payload)
+    return payload
+
+
+def _preferred_encoding(accept_encoding: str) -> Optional[str]:
+    """Highest-q encoding among br and gzip, preferring br on ties."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip().lower()] = quality
+    ranked = sorted(
+        ((offered.get(coding, offered.get("*", 0.0)), coding) for coding in ("br", "gzip")),
+        key=lambda item: (item[0], item[1] == "br"),
+        reverse=True,
+    )
+    quality, coding = ranked[0]
+    return coding if quality > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing whole responses negotiated by Accept-Encoding."""
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _preferred_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or content_type.startswith("image/"):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message  # held until we know the body size
+                return
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False):
+                # Streaming response: send it as is
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            if len(body) >= self.minimum_size:
+                body = compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,18 +1,62 @@
-from fastapi import FastAPI
-from app.core.database import engine, Base
-from app.routers import collection, saved_recipes, swipe_sessions, cooking_sessions
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.core.concurrency import AdmissionRejected
+from app.core.config import settings
+from app.core.log import configure_logging
+from app.core.metrics import InstrumentationMiddleware
+from app.core.serialization import CompressionMiddleware
+from app.routers import collection, saved_recipes, swipe_sessions, cooking_sessions, metrics, admin, recipes, images
+from app.services.catalog_index import catalog
+from app.services.popularity import run_refresher as run_popularity_refresher
+from app.services.session_reaper import run_reaper
+from app.services.session_store import store as session_store
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+configure_logging(settings.LOG_LEVEL)
 
-app = FastAPI(title="Little Chef API")
+# The schema is managed by Alembic only: run `alembic upgrade head` before starting
+# workers. Importing this module must not touch the database.
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(session_store.run_flusher(settings.SESSION_FLUSH_INTERVAL_SECONDS)),
+        asyncio.create_task(catalog.run_refresher(settings.CATALOG_REFRESH_SECONDS)),
+        asyncio.create_task(run_reaper(settings.SESSION_REAPER_INTERVAL_SECONDS)),
+        asyncio.create_task(run_popularity_refresher(settings.POPULARITY_REFRESH_SECONDS)),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    # Write back whatever is still pending before the worker exits
+    session_store.flush()
+
+app = FastAPI(title="Little Chef API", lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+app.add_middleware(InstrumentationMiddleware)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    # AI work shed under load; clients should retry after the hinted delay
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": "The cooking assistant is busy, please retry shortly"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 # Include routers
 app.include_router(collection.router)
 app.include_router(saved_recipes.router)
+app.include_router(recipes.router)
+app.include_router(images.router)
 app.include_router(swipe_sessions.router)
 app.include_router(cooking_sessions.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Little Chef API"}
\ No newline at end of file
+    return {"message": "Welcome to Little Chef API"}
@@ -1,2 +1,4 @@
-from .recipe import Recipe, SavedRecipe
-from .swipe_session import SwipeSession
\ No newline at end of file
+from .recipe import Recipe, RecipeAlias, RecipeLSHBand, RecipeTombstone, SavedRecipe
+from .swipe_session import SwipeSession, SwipeEvent
+from .popularity import RecipePopularity, TagPopularity, PopularityState
+from .tag import Tag
\ No newline at end of file
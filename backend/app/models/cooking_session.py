@@ -11,4 +11,4 @@ class CookingSession(Base):
     current_step = Column(Integer, default=0)  # 0-based index for step number
     conversation_history = Column(JSON, default=list)  # List of message objects
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # expired sessions are reaped by age
\ No newline at end of file
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, UUID, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class RecipePopularity(Base):
+    """Swipe totals per recipe, folded in from swipe_events by the popularity aggregator"""
+    __tablename__ = "recipe_popularity"
+
+    recipe_id = Column(UUID(as_uuid=True), ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True)
+    likes = Column(Integer, nullable=False, default=0)
+    swipes = Column(Integer, nullable=False, default=0)
+
+class TagPopularity(Base):
+    """Swipe totals per tag (a swipe counts for every tag of the swiped recipe)"""
+    __tablename__ = "tag_popularity"
+
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    likes = Column(Integer, nullable=False, default=0)
+    swipes = Column(Integer, nullable=False, default=0)
+
+class PopularityState(Base):
+    """Single row holding the id of the last swipe event folded into the totals"""
+    __tablename__ = "popularity_state"
+
+    id = Column(Integer, primary_key=True)
+    last_event_id = Column(BigInteger, nullable=False, default=0)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, JSON, Text, ARRAY, DateTime, UUID, Integer, ForeignKey
+from sqlalchemy import Column, String, JSON, Text, ARRAY, DateTime, UUID, Integer, SmallInteger, BigInteger, LargeBinary, Float, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -14,9 +15,46 @@ class Recipe(Base):
     images = Column(ARRAY(String), default=[])
     total_time = Column(Integer, nullable=True)  # in minutes
     servings = Column(Integer, nullable=True)    # number of servings
-    tags = Column(ARRAY(String), default=[])
+    tag_ids = Column(ARRAY(Integer), default=[])  # ids into the tags table
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     hash = Column(String(64))  # for change detection
+    ingredient_names = Column(ARRAY(Text), default=[])  # normalized ingredient keys, for search
+    search_vector = Column(TSVECTOR)  # maintained by the scraper pipeline
+    minhash = Column(LargeBinary, nullable=True)  # MinHash signature, for near-duplicate detection
+    sync_version = Column(BigInteger, index=True)  # bumped by a trigger on visible changes, for delta sync
+
+    __table_args__ = (
+        Index("ix_recipes_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_recipes_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
+class RecipeLSHBand(Base):
+    """One LSH bucket of a recipe's MinHash signature; recipes sharing a bucket are duplicate candidates"""
+    __tablename__ = "recipe_lsh_bands"
+
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    recipe_id = Column(UUID(as_uuid=True), ForeignKey("recipes.id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class RecipeAlias(Base):
+    """A scraped URL whose recipe was a near-duplicate of one we already had"""
+    __tablename__ = "recipe_aliases"
+
+    source_url = Column(String, primary_key=True)
+    recipe_id = Column(UUID(as_uuid=True), ForeignKey("recipes.id", ondelete="CASCADE"), nullable=False, index=True)
+    similarity = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<RecipeAlias(source_url={self.source_url}, recipe_id={self.recipe_id})>"
+
+class RecipeTombstone(Base):
+    """A deleted recipe, kept so syncing clients learn to drop it"""
+    __tablename__ = "recipe_tombstones"
+
+    recipe_id = Column(UUID(as_uuid=True), primary_key=True)
+    sync_version = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime(timezone=True), nullable=False)
 
 class SavedRecipe(Base):
     __tablename__ = "saved_recipes"
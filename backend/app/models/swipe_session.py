@@ -1,4 +1,4 @@
-from sqlalchemy import Column, UUID, JSON, ARRAY, DateTime
+from sqlalchemy import Column, UUID, ARRAY, DateTime, LargeBinary, BigInteger, Boolean
 from sqlalchemy.sql import func
 from app.core.database import Base
 import uuid
@@ -7,7 +7,18 @@ class SwipeSession(Base):
     __tablename__ = "swipe_sessions"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    tag_weights = Column(JSON, default={})  # Store tag weights: {"tag": weight}
+    preferences = Column(LargeBinary, nullable=True)  # Packed TagPreferences, bounded size
     seen_recipes = Column(ARRAY(UUID(as_uuid=True)), default=[])  # Keep as UUID array
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # expired sessions are reaped by age
+
+class SwipeEvent(Base):
+    """One swipe outcome, appended for popularity aggregation"""
+    __tablename__ = "swipe_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    # No foreign keys: sessions expire and recipes may be removed before events are aggregated
+    session_id = Column(UUID(as_uuid=True), nullable=False)
+    recipe_id = Column(UUID(as_uuid=True), nullable=False)
+    liked = Column(Boolean, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
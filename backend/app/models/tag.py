@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+class Tag(Base):
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)  # normalized tag text
+
+    def __repr__(self):
+        return f"<Tag(id={self.id}, name={self.name})>"
@@ -1 +1 @@
-from . import collection, saved_recipes, swipe_sessions
\ No newline at end of file
+from . import collection, saved_recipes, swipe_sessions, cooking_sessions, metrics, admin, recipes, images
\ No newline at end of file
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from app.core import profiling
+from app.core.security import require_admin
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)]
+)
+
+class ProfilingRequest(BaseModel):
+    mode: Literal["sample", "cprofile"] = "sample"
+    duration_seconds: float = Field(30, gt=0, le=600)
+    sample_rate: float = Field(1.0, gt=0, le=1, description="Fraction of requests to profile (cprofile mode)")
+    interval_ms: float = Field(10, ge=1, le=1000, description="Stack sampling interval (sample mode)")
+    route_prefix: Optional[str] = Field(None, description="Only profile routes starting with this path (cprofile mode)")
+
+@router.post("/profiling/start")
+def start_profiling(request: ProfilingRequest):
+    """Start profiling this worker; any previous session is discarded"""
+    session = profiling.ProfilingSession(
+        mode=request.mode,
+        duration=request.duration_seconds,
+        sample_rate=request.sample_rate,
+        interval=request.interval_ms / 1000,
+        route_prefix=request.route_prefix,
+    )
+    profiling.start_session(session)
+    return session.status()
+
+@router.post("/profiling/stop")
+def stop_profiling():
+    session = profiling.stop_session()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling session")
+    return session.status()
+
+@router.get("/profiling/status")
+def profiling_status():
+    session = profiling.current_session()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling session")
+    return session.status()
+
+@router.get("/profiling/result")
+def profiling_result(format: Literal["collapsed", "pstats", "text"] = "collapsed"):
+    """
+    Download the current profile: `collapsed` stacks for flamegraph.pl/speedscope,
+    a binary `pstats` file, or a `text` summary of the cProfile data
+    """
+    session = profiling.current_session()
+    if session is None:
+        raise HTTPException(status_code=404, detail="No profiling session")
+
+    if format == "collapsed":
+        return PlainTextResponse(session.collapsed())
+    if format == "text":
+        return PlainTextResponse(session.pstats_text())
+    return Response(
+        content=session.pstats_dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": 'attachment; filename="profile.pstats"'}
+    )
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, note_write, read_db
+from app.core.profiling import ProfiledRoute
 from app.models.cooking_session import CookingSession
 from app.models.recipe import Recipe
 from app.schemas.cooking_session import (
@@ -14,9 +15,10 @@ from app.schemas.cooking_session import (
 from datetime import datetime
 from typing import List
 from app.services.ai_service import AIService
+from app.services.step_analysis import analyzer as step_analyzer
 import uuid
 
-router = APIRouter(prefix="/cooking-sessions", tags=["cooking-sessions"])
+router = APIRouter(prefix="/cooking-sessions", tags=["cooking-sessions"], route_class=ProfiledRoute)
 
 @router.post("/", response_model=CookingSessionSchema)
 def create_cooking_session(
@@ -36,6 +38,7 @@ def create_cooking_session(
     db.add(cooking_session)
     db.commit()
     db.refresh(cooking_session)
+    note_write("cooking_session", cooking_session.id)
     return cooking_session
 
 @router.post("/{session_id}/step_actions", response_model=StepActionResponse)
@@ -51,15 +54,20 @@ async def get_step_actions(
     # Update current step
     session.current_step = request.step_number
     db.commit()
+    note_write("cooking_session", session_id)
     
     # Get recipe data
-    recipe = db.query(Recipe).filter(Recipe.id == session.recipe_id).first()
+    recipe = db.query(Recipe.steps).filter(Recipe.id == session.recipe_id).first()
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
+    if not 0 <= request.step_number < len(recipe.steps):
+        raise HTTPException(status_code=400, detail="Step not found")
+    steps = recipe.steps
+    # Release the connection while waiting for the model
+    db.close()
 
-    # Use AI to analyze step
-    ai = AIService()
-    actions = await ai.analyze_step(recipe.__dict__, request.step_number)
+    # Analyses are shared across sessions, and the following steps are prefetched
+    actions = await step_analyzer.actions(steps, request.step_number)
     
     return StepActionResponse(actions=actions)
 
@@ -73,46 +81,51 @@ async def chat_with_chef(
     if not session:
         raise HTTPException(status_code=404, detail="Cooking session not found")
     
-    # Add user message to history
-    if not session.conversation_history:
-        session.conversation_history = []
-    
-    session.conversation_history.append({
+    # Get recipe data
+    recipe = db.query(Recipe.title, Recipe.steps, Recipe.ingredients).filter(Recipe.id == session.recipe_id).first()
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+
+    user_message = {
         "role": "user",
         "content": request.message,
         "timestamp": datetime.utcnow().isoformat(),
         "suggested_actions": None
-    })
-    
-    # Get recipe data
-    recipe = db.query(Recipe).filter(Recipe.id == session.recipe_id).first()
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
+    }
+    history = [*(session.conversation_history or []), user_message]
+    current_step = session.current_step
+    # Release the connection while waiting for the model
+    db.close()
 
     # Use AI for chat response
     ai = AIService()
     response = await ai.chat(
-        recipe.__dict__,
-        session.current_step,
-        session.conversation_history,
+        {"title": recipe.title, "steps": recipe.steps, "ingredients": recipe.ingredients},
+        current_step,
+        history,
         request.message
     )
-    
-    # Add assistant response to history
-    session.conversation_history.append({
+
+    assistant_message = {
         "role": "assistant",
         "content": response["message"],
         "timestamp": datetime.utcnow().isoformat(),
         "suggested_actions": response["suggested_actions"]
-    })
-    
+    }
+
+    # Re-read under a row lock so concurrent chats in one session both get appended
+    session = db.query(CookingSession).filter(CookingSession.id == session_id).with_for_update().first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Cooking session not found")
+    session.conversation_history = [*(session.conversation_history or []), user_message, assistant_message]
     db.commit()
+    note_write("cooking_session", session_id)
     return ChatResponse(**response)
 
 @router.get("/{session_id}", response_model=CookingSessionSchema)
 def get_cooking_session(
     session_id: uuid.UUID,
-    db: Session = Depends(get_db)
+    db: Session = Depends(read_db("cooking_session"))
 ):
     session = db.query(CookingSession).filter(CookingSession.id == session_id).first()
     if not session:
@@ -130,4 +143,5 @@ async def delete_cooking_session(
     
     db.delete(session)
     db.commit()
+    note_write("cooking_session", session_id)
     return {"message": "Cooking session deleted"}
\ No newline at end of file
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response
+from fastapi.responses import FileResponse
+from PIL import Image
+from sqlalchemy.orm import Session
+from app.core.database import get_read_db
+from app.core.profiling import ProfiledRoute
+from app.models import Recipe
+from app.services.image_service import FORMATS, VARIANTS, ImageFetchError, get_cache, image_version, negotiate_format
+from typing import Optional
+from uuid import UUID
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/images",
+    tags=["images"],
+    route_class=ProfiledRoute
+)
+
+# A URL whose version matches the recipe's current image never changes meaning;
+# anything else (no or an outdated version) is revalidated against the ETag
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
+@router.get("/{recipe_id}/{index}")
+async def get_recipe_image(
+    request: Request,
+    recipe_id: UUID,
+    index: int = Path(..., ge=0),
+    size: str = Query("card", pattern=f"^({'|'.join(VARIANTS)})$"),
+    v: Optional[str] = Query(None, max_length=64),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Serve a resized, recompressed variant of one of a recipe's images
+    """
+    # Only proxy URLs we scraped, never arbitrary ones
+    images = db.query(Recipe.images).filter(Recipe.id == recipe_id).scalar()
+    if not images or index >= len(images) or not images[index]:
+        raise HTTPException(status_code=404, detail="Image not found")
+    # Release the connection before the (possibly slow) fetch and resize
+    db.close()
+
+    fmt = negotiate_format(request.headers.get("accept"))
+    try:
+        path, etag = await get_cache().variant(images[index], size, fmt)
+    except ImageFetchError as e:
+        logger.warning("Image fetch failed", extra={"recipe_id": str(recipe_id), "index": index, "error": str(e)})
+        raise HTTPException(status_code=502, detail="Could not fetch source image")
+    except (OSError, Image.DecompressionBombError) as e:
+        # Pillow raises OSError subclasses for data it cannot decode, and a
+        # DecompressionBombError (an Exception) for images too large to decode
+        logger.warning("Image render failed", extra={"recipe_id": str(recipe_id), "index": index, "error": str(e)})
+        raise HTTPException(status_code=502, detail="Source image could not be processed")
+
+    cache_control = CACHE_CONTROL if v == image_version(images[index]) else REVALIDATE_CACHE_CONTROL
+    headers = {"Cache-Control": cache_control, "ETag": f'"{etag}"', "Vary": "Accept"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=FORMATS[fmt][1], headers=headers)
@@ -0,0 +1,108 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from app.core.database import get_read_db
+from app.core.serialization import fast_json
+from app.core.profiling import ProfiledRoute
+from app.models import Recipe
+from app.schemas.recipe import RecipeChangesResponse, RecipeSearchResponse, SimilarRecipesResponse
+from app.services import catalog_sync, search
+from app.services.catalog_index import catalog
+from app.services.image_service import proxied_images
+from app.services.tag_vocabulary import vocabulary
+from typing import List
+from uuid import UUID
+
+router = APIRouter(
+    prefix="/recipes",
+    tags=["recipes"],
+    route_class=ProfiledRoute
+)
+
+@router.get("/search", response_model=RecipeSearchResponse)
+def search_recipes(
+    q: str = Query(None, min_length=1, max_length=200, description="Free-text query over title, ingredients, tags and steps"),
+    have: List[str] = Query([], description="Ingredients on hand; returns recipes they cover"),
+    max_missing: int = Query(0, ge=0, le=20, description="Ingredients a recipe may need beyond `have`"),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search recipes by text, or find recipes you can make with the ingredients you have
+    """
+    if not q and not have:
+        raise HTTPException(status_code=400, detail="Provide a query `q` or at least one `have` ingredient")
+
+    # Fetch one extra row to know whether there is another page
+    offset = (page - 1) * page_size
+    if q:
+        rows = search.search_recipes(db, q, page_size + 1, offset)
+    else:
+        rows = search.recipes_from_ingredients(db, catalog.get(db), have, max_missing, page_size + 1, offset)
+
+    results = [
+        {
+            "id": row.id,
+            "title": row.title,
+            "image": next((image for image in proxied_images(row.id, row.images, "thumbnail") or [] if image), None),
+            "total_time": row.total_time,
+            "servings": row.servings,
+            "tags": vocabulary.names_for(db, row.tag_ids),
+            "rank": row.rank,
+        }
+        for row in rows[:page_size]
+    ]
+    return {
+        "results": results,
+        "page": page,
+        "page_size": page_size,
+        "has_more": len(rows) > page_size,
+    }
+
+@router.get("/changes", response_model=RecipeChangesResponse)
+def get_recipe_changes(
+    since: int = Query(0, ge=0, description="`version` from the previous response; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=2000),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Recipes added, changed or deleted since a previous sync, for clients that keep a local catalog
+    """
+    return fast_json(catalog_sync.changes(db, since, limit))
+
+@router.get("/{recipe_id}/similar", response_model=SimilarRecipesResponse)
+def get_similar_recipes(
+    recipe_id: UUID,
+    k: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Recipes most like this one, by title, ingredients and tags
+    """
+    neighbours = catalog.get(db).similar(recipe_id, k)
+    if not neighbours:
+        if not db.query(Recipe.id).filter(Recipe.id == recipe_id).first():
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        # Scraped after the index was built; it gets neighbours on the next refresh
+        return {"recipe_id": recipe_id, "results": []}
+
+    similarity = dict(neighbours)
+    rows = (
+        db.query(Recipe.id, Recipe.title, Recipe.images, Recipe.total_time, Recipe.servings, Recipe.tag_ids)
+        .filter(Recipe.id.in_(similarity))
+        .all()
+    )
+    rows.sort(key=lambda row: similarity[row.id], reverse=True)
+    results = [
+        {
+            "id": row.id,
+            "title": row.title,
+            "image": next((image for image in proxied_images(row.id, row.images, "thumbnail") or [] if image), None),
+            "total_time": row.total_time,
+            "servings": row.servings,
+            "tags": vocabulary.names_for(db, row.tag_ids),
+            "rank": similarity[row.id],
+        }
+        for row in rows
+    ]
+    return {"recipe_id": recipe_id, "results": results}
@@ -1,18 +1,22 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import get_db, note_write, read_db
+from app.core.profiling import ProfiledRoute
 from app.models import Recipe as DBRecipe, SavedRecipe
 from app.schemas.recipe import Recipe as RecipeSchema
+from app.core.serialization import fast_json
+from app.services.recipe_payload import recipe_to_dict
 from typing import List
 from uuid import UUID
 
 router = APIRouter(
     prefix="/saved-recipes",
-    tags=["saved_recipes"]
+    tags=["saved_recipes"],
+    route_class=ProfiledRoute
 )
 
 @router.get("/", response_model=List[RecipeSchema])
-async def get_saved_recipes(db: Session = Depends(get_db)):
+async def get_saved_recipes(db: Session = Depends(read_db("saved_recipes"))):
     # Get all saved recipes with their full recipe data
     recipes = (
         db.query(DBRecipe)
@@ -22,24 +26,7 @@ async def get_saved_recipes(db: Session = Depends(get_db)):
     )
     
     # Create response with is_saved=True for all recipes
-    recipe_responses = []
-    for recipe in recipes:
-        # Convert SQLAlchemy model to dict and add is_saved
-        recipe_dict = {
-            "id": recipe.id,
-            "title": recipe.title,
-            "ingredients": recipe.ingredients,
-            "steps": recipe.steps,
-            "source_url": recipe.source_url,
-            "images": recipe.images,
-            "total_time": recipe.total_time,
-            "servings": recipe.servings,  # Added servings field
-            "tags": recipe.tags,
-            "hash": recipe.hash,
-            "is_saved": True
-        }
-        recipe_responses.append(recipe_dict)
-    return recipe_responses
+    return fast_json([recipe_to_dict(db, recipe, is_saved=True) for recipe in recipes])
 
 @router.delete("/{recipe_id}")
 async def unsave_recipe(recipe_id: UUID, db: Session = Depends(get_db)):
@@ -49,4 +36,5 @@ async def unsave_recipe(recipe_id: UUID, db: Session = Depends(get_db)):
     
     db.delete(saved_recipe)
     db.commit()
+    note_write("saved_recipes")
     return {"message": "Recipe removed from saved recipes"}
\ No newline at end of file
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import event
-from app.core.database import get_db
-from app.models import Recipe, SavedRecipe, SwipeSession
-from app.schemas.recipe import Recipe as RecipeSchema
+from app.core.config import settings
+from app.core.database import get_db, note_write, read_db
+from app.core.serialization import fast_json
+from app.core.profiling import ProfiledRoute
+from app.models import Recipe, SavedRecipe
+from app.schemas.recipe import Recipe as RecipeSchema, RecipeFilters
+from app.services.catalog_index import catalog
+from app.services.popularity import priors, prior_strength
+from app.services.recipe_payload import recipe_to_dict
+from app.services.session_store import store as session_store
 from typing import Optional, List, Dict, Union
 from uuid import UUID
-import random
-from sqlalchemy.orm.attributes import flag_modified
 from pydantic import BaseModel
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/swipe-sessions",
-    tags=["swipe_sessions"]
+    tags=["swipe_sessions"],
+    route_class=ProfiledRoute
 )
 
 LIKE_WEIGHT = 1.0
@@ -24,14 +32,10 @@ class NextRecipeResponse(BaseModel):
     recipe: Optional[RecipeSchema] = None
 
 @router.post("/start")
-async def start_session(db: Session = Depends(get_db)):
+async def start_session():
     """Start a new swiping session"""
-    session = SwipeSession()
-    session.seen_recipes = []
-    db.add(session)
-    db.commit()
-    db.refresh(session)
-    print(f"Created new session with ID: {session.id}")
+    session = session_store.create()
+    logger.info("Created swipe session", extra={"session_id": str(session.id)})
     return {"session_id": session.id}
 
 @router.post("/{session_id}/swipe/{recipe_id}")
@@ -43,42 +47,20 @@ async def register_swipe(
     db: Session = Depends(get_db)
 ):
     """Register a swipe for a recipe and update tag weights"""
-    print(f"\n--- Processing swipe for session {session_id} ---")
-    
-    session = db.query(SwipeSession).filter(SwipeSession.id == session_id).first()
+    session = session_store.get(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
+    # Recipes scraped since the index was built are looked up directly
+    tag_ids = (await catalog.aget(db)).tag_ids_of(recipe_id)
+    if tag_ids is None:
+        recipe = db.query(Recipe.id, Recipe.tag_ids).filter(Recipe.id == recipe_id).first()
+        if not recipe:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+        tag_ids = recipe.tag_ids or []
 
-    # Update seen recipes
-    if session.seen_recipes is None:
-        session.seen_recipes = []
-    
-    print(f"Current seen recipes: {session.seen_recipes}")
-    
-    if recipe_id not in session.seen_recipes:
-        # Create a new list and assign it
-        new_seen_recipes = list(session.seen_recipes)
-        new_seen_recipes.append(recipe_id)
-        session.seen_recipes = new_seen_recipes
-        # Mark as modified
-        flag_modified(session, "seen_recipes")
-        print(f"Updated seen recipes to: {session.seen_recipes}")
-    
-    # Update tag weights
-    if session.tag_weights is None:
-        session.tag_weights = {}
-    
-    weight_change = LIKE_WEIGHT if liked else DISLIKE_WEIGHT
-    for tag in recipe.tags:
-        current_weight = session.tag_weights.get(tag, DEFAULT_WEIGHT)
-        session.tag_weights[tag] = current_weight + weight_change
-    
-    # Mark tag_weights as modified too
-    flag_modified(session, "tag_weights")
+    # Update seen recipes and decayed tag weights in memory; written back in batches
+    session_store.record_swipe(session, recipe_id, tag_ids, LIKE_WEIGHT if liked else DISLIKE_WEIGHT)
     
     # Save recipe if requested
     if save:
@@ -86,96 +68,71 @@ async def register_swipe(
         if not existing_save:
             saved_recipe = SavedRecipe(recipe_id=recipe_id)
             db.add(saved_recipe)
-
-    print("Committing changes...")
-    db.commit()
-    db.refresh(session)
-    print(f"After commit - seen_recipes: {session.seen_recipes}")
+            db.commit()
+            note_write("saved_recipes")
+
+    logger.debug(
+        "Registered swipe",
+        extra={
+            "session_id": str(session_id),
+            "recipe_id": str(recipe_id),
+            "liked": liked,
+            "saved": save,
+            "seen_count": len(session.seen),
+        },
+    )
     
     return {"message": "Swipe registered successfully"}
 
 @router.get("/{session_id}/next", response_model=NextRecipeResponse)
-async def get_next_recipe(session_id: UUID, db: Session = Depends(get_db)):
-    """Get next recipe based on session preferences"""
-    print(f"\n--- Getting next recipe for session {session_id} ---")
-    
-    session = db.query(SwipeSession).filter(SwipeSession.id == session_id).first()
+async def get_next_recipe(
+    session_id: UUID,
+    filters: RecipeFilters = Query(),
+    db: Session = Depends(read_db("swipe_session"))
+):
+    """Get next recipe based on session preferences, optionally restricted by filters"""
+    session = session_store.get(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if session.seen_recipes is None:
-        session.seen_recipes = []
-        flag_modified(session, "seen_recipes")
-        db.commit()
-
-    # Get all recipes excluding seen ones
-    total_recipes = db.query(Recipe).count()
-    seen_recipe_ids = session.seen_recipes or []
-    
-    print(f"Total recipes: {total_recipes}")
-    print(f"Seen recipes: {seen_recipe_ids}")
-    
-    unseen_recipes = db.query(Recipe).filter(Recipe.id.notin_(seen_recipe_ids)).all()
-    print(f"Unseen recipes: {len(unseen_recipes)}")
-    
-    if not unseen_recipes:
-        print("No more unseen recipes!")
+    # Score and draw from the in-memory catalog index; the full row is only
+    # loaded for the recipe we end up selecting. New sessions lean on what other
+    # users liked until their own swipes take over.
+    index = await catalog.aget(db)
+    strength = prior_strength(len(session.seen))
+    selected_id = index.sample(
+        priors.weight_table(session.preferences.dense(DEFAULT_WEIGHT), strength),
+        exclude=session.seen,
+        filters=filters,
+        similar_to=session.last_liked,
+        similarity_boost=settings.SIMILARITY_BOOST,
+        prior=priors.recipe_prior(index, strength)
+    )
+    selected_recipe = db.query(Recipe).filter(Recipe.id == selected_id).first() if selected_id else None
+
+    if not selected_recipe:
+        logger.debug("No more unseen recipes", extra={"session_id": str(session_id)})
         return NextRecipeResponse(has_more_recipes=False)
 
-    # Calculate recipe scores
-    tag_weights = session.tag_weights or {}
-    recipe_scores = []
-    
-    for recipe in unseen_recipes:
-        score = 0
-        for tag in recipe.tags:
-            weight = tag_weights.get(tag, DEFAULT_WEIGHT)
-            score += weight
-        recipe_scores.append((recipe, score))
-
-    # Calculate probabilities
-    total_score = sum(max(0.1, score) for _, score in recipe_scores)
-    weights = [max(0.1, score) / total_score for _, score in recipe_scores]
-    
-    # Select recipe
-    selected_recipe = random.choices(
-        [recipe for recipe, _ in recipe_scores],
-        weights=weights,
-        k=1
-    )[0]
-
-    print(f"Selected recipe: {selected_recipe.id}")
+    logger.debug(
+        "Selected recipe",
+        extra={
+            "session_id": str(session_id),
+            "recipe_id": str(selected_recipe.id),
+            "seen_count": len(session.seen),
+        },
+    )
 
     # Check if recipe is saved
     is_saved = db.query(SavedRecipe).filter(SavedRecipe.recipe_id == selected_recipe.id).first() is not None
 
-    # Create response with is_saved field and servings
-    recipe_dict = {
-        "id": selected_recipe.id,
-        "title": selected_recipe.title,
-        "ingredients": selected_recipe.ingredients,
-        "steps": selected_recipe.steps,
-        "source_url": selected_recipe.source_url,
-        "images": selected_recipe.images,
-        "total_time": selected_recipe.total_time,
-        "servings": selected_recipe.servings,  # Added servings field
-        "tags": selected_recipe.tags,
-        "hash": selected_recipe.hash,
-        "is_saved": is_saved
-    }
-    
-    return NextRecipeResponse(has_more_recipes=True, recipe=recipe_dict)
+    return fast_json({"has_more_recipes": True, "recipe": recipe_to_dict(db, selected_recipe, is_saved)})
 
 @router.delete("/{session_id}")
 async def end_session(session_id: UUID, db: Session = Depends(get_db)):
     """End a swiping session"""
-    session = db.query(SwipeSession).filter(SwipeSession.id == session_id).first()
-    if not session:
+    if not session_store.delete(db, session_id):
         raise HTTPException(status_code=404, detail="Session not found")
 
-    print(f"Ending session {session_id}")
-    print(f"Final seen_recipes: {session.seen_recipes}")
-    
-    db.delete(session)
-    db.commit()
+    logger.info("Ended swipe session", extra={"session_id": str(session_id)})
     return {"message": "Session ended successfully"}
\ No newline at end of file
@@ -1,8 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
 
-class Recipe(BaseModel):
+class RecipeContent(BaseModel):
     id: UUID
     title: str
     ingredients: dict
@@ -13,7 +13,55 @@ class Recipe(BaseModel):
     servings: Optional[int] = 4  # Default to 4 servings if not provided
     tags: List[str] = []
     hash: str
-    is_saved: bool = False
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class Recipe(RecipeContent):
+    is_saved: bool = False
+
+class RecipeFilters(BaseModel):
+    min_total_time: Optional[int] = Field(None, ge=0, description="Minimum total time in minutes")
+    max_total_time: Optional[int] = Field(None, ge=0, description="Maximum total time in minutes")
+    min_servings: Optional[int] = Field(None, ge=0)
+    max_servings: Optional[int] = Field(None, ge=0)
+    include_tags: List[str] = Field([], description="Recipes must have all of these tags")
+    exclude_tags: List[str] = Field([], description="Recipes must have none of these tags")
+    include_ingredients: List[str] = Field([], description="Recipes must use all of these ingredients")
+    exclude_ingredients: List[str] = Field([], description="Recipes must use none of these ingredients")
+
+    def is_empty(self) -> bool:
+        return self.cache_key() == RecipeFilters().cache_key()
+
+    def cache_key(self) -> tuple:
+        return (
+            self.min_total_time, self.max_total_time, self.min_servings, self.max_servings,
+            tuple(sorted(self.include_tags)), tuple(sorted(self.exclude_tags)),
+            tuple(sorted(self.include_ingredients)), tuple(sorted(self.exclude_ingredients)),
+        )
+
+class RecipeSearchResult(BaseModel):
+    id: UUID
+    title: str
+    image: Optional[str] = None
+    total_time: Optional[int] = None
+    servings: Optional[int] = None
+    tags: List[str] = []
+    rank: float
+
+class RecipeSearchResponse(BaseModel):
+    results: List[RecipeSearchResult]
+    page: int
+    page_size: int
+    has_more: bool
+
+class SimilarRecipesResponse(BaseModel):
+    recipe_id: UUID
+    results: List[RecipeSearchResult]  # `rank` is the cosine similarity
+
+class RecipeChangesResponse(BaseModel):
+    since: int
+    version: int  # pass as `since` on the next request
+    has_more: bool
+    recipes: List[RecipeContent]  # added or changed since `since`, to upsert by id
+    deleted: List[UUID]
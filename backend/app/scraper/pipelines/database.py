@@ -1,42 +1,108 @@
-from app.models import Recipe
+from app.core.database import SessionLocal
+from app.models import Recipe, RecipeAlias
+from app.services import dedup
+from app.services.search import normalize_ingredient, search_vector
+from app.services.tag_vocabulary import vocabulary
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Sent with (item, outcome) once an item is stored; outcome is one of
+# "added", "updated", "unchanged", "merged" or "known_duplicate"
+recipe_stored = object()
+
 class DatabasePipeline:
-    def __init__(self, db_session):
-        self.db_session = db_session
+    """Stores scraped recipes, each in its own short-lived database session."""
+
+    def __init__(self, signals=None, session_factory=SessionLocal):
+        self.signals = signals
+        self.session_factory = session_factory
 
     @classmethod
     def from_crawler(cls, crawler):
-        return cls(
-            db_session=crawler.spider.db_session
-        )
+        return cls(signals=crawler.signals)
+
+    def open_spider(self, spider):
+        # Recipes stored before dedup existed need signatures to be matched against
+        db = self.session_factory()
+        try:
+            dedup.backfill_signatures(db)
+        finally:
+            db.close()
 
     def process_item(self, item, spider):
+        db = self.session_factory()
         try:
+            outcome = self._store(db, item)
+        finally:
+            db.close()
+        if self.signals is not None:
+            self.signals.send_catch_log(signal=recipe_stored, item=item, outcome=outcome)
+        return item
+
+    def _store(self, db, item) -> str:
+        try:
+            # URLs already merged into another recipe are not stored again
+            alias = db.get(RecipeAlias, item['source_url'])
+            if alias:
+                logger.info(f"Skipped known duplicate: {item['title']}", extra={"recipe_id": str(alias.recipe_id)})
+                return "known_duplicate"
+
+            # Store tags as ids into the shared vocabulary
+            recipe_data = dict(item)
+            tag_names = recipe_data.pop('tags', [])
+            recipe_data['tag_ids'] = vocabulary.ids_for(db, tag_names)
+
+            # Keep the search columns in step with the content
+            recipe_data['ingredient_names'] = sorted({normalize_ingredient(name) for name in item['ingredients']})
+            recipe_data['search_vector'] = search_vector(
+                item['title'], recipe_data['ingredient_names'], tag_names, item['steps']
+            )
+
             # Check if recipe exists
-            existing_recipe = self.db_session.query(Recipe).filter(
+            existing_recipe = db.query(Recipe).filter(
                 Recipe.source_url == item['source_url']
             ).first()
 
+            signature = dedup.recipe_signature(item['ingredients'], item['steps'])
+            outcome = "unchanged"
             if existing_recipe:
                 if item['hash'] != existing_recipe.hash:
                     # Update existing recipe
-                    for key, value in item.items():
+                    for key, value in recipe_data.items():
                         setattr(existing_recipe, key, value)
+                    db.flush()
+                    dedup.index_recipe(db, existing_recipe.id, signature)
                     logger.info(f"Updated recipe: {item['title']}")
+                    outcome = "updated"
             else:
-                # Create new recipe
-                db_recipe = Recipe(**item)
-                self.db_session.add(db_recipe)
-                logger.info(f"Added new recipe: {item['title']}")
+                # The same dish is often listed under several topics and URLs
+                duplicate = dedup.find_duplicate(db, signature)
+                if duplicate:
+                    recipe_id, similarity = duplicate
+                    db.add(RecipeAlias(
+                        source_url=item['source_url'], recipe_id=recipe_id, similarity=similarity
+                    ))
+                    logger.info(
+                        f"Merged near-duplicate recipe: {item['title']}",
+                        extra={"recipe_id": str(recipe_id), "similarity": similarity}
+                    )
+                    outcome = "merged"
+                else:
+                    # Create new recipe
+                    db_recipe = Recipe(id=uuid.uuid4(), **recipe_data)
+                    db.add(db_recipe)
+                    db.flush()
+                    dedup.index_recipe(db, db_recipe.id, signature)
+                    logger.info(f"Added new recipe: {item['title']}")
+                    outcome = "added"
 
             # Commit after each recipe
-            self.db_session.commit()
-            return item
+            db.commit()
+            return outcome
 
         except Exception as e:
             logger.error(f"Error processing recipe {item.get('title', 'Unknown')}: {str(e)}")
-            self.db_session.rollback()
+            db.rollback()
             raise
\ No newline at end of file
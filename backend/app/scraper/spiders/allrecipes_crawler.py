@@ -4,6 +4,7 @@ import hashlib
 import json
 from scrapy.exceptions import CloseSpider
 import re
+from app.services.tag_vocabulary import normalize_tags
 
 def parse_time_to_minutes(time_str: str) -> int:
     """Convert time string like '1 hr 25 mins' to minutes"""
@@ -37,11 +38,10 @@ class AllrecipesCrawlerSpider(scrapy.Spider):
         }
     }
 
-    def __init__(self, db_session=None, max_recipes=100, *args, **kwargs):
+    def __init__(self, max_recipes=100, *args, **kwargs):
         super(AllrecipesCrawlerSpider, self).__init__(*args, **kwargs)
         self.recipes_count = 0
         self.max_recipes = max_recipes
-        self.db_session = db_session
 
     def parse(self, response):
         if self.recipes_count >= self.max_recipes:
@@ -134,9 +134,9 @@ class AllrecipesCrawlerSpider(scrapy.Spider):
             if total_time_element:
                 total_time = parse_time_to_minutes(total_time_element.strip())
 
-            # Extract parsely tags
+            # Extract parsely tags, normalized so variants share one vocabulary entry
             tags = response.css('meta[name="parsely-tags"]::attr(content)').get()
-            tags = [tag.strip() for tag in tags.split(',')] if tags else []
+            tags = normalize_tags(tags.split(',')) if tags else []
 
             # Get recipe step images
             step_images = response.css('figure.mntl-sc-block-image img::attr(data-hi-res-src)').getall()
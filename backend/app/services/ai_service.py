@@ -1,16 +1,36 @@
 from openai import AsyncOpenAI
+from app.core.concurrency import AdmissionController
 from app.core.config import settings
+from app.core.metrics import span
+from enum import IntEnum
 import json
 from typing import List, Dict, Optional, Any
 from app.schemas.cooking_session import Action, TimerAction, TemperatureAction
 
+class Priority(IntEnum):
+    """Order in which queued AI work is admitted; background work is never queued."""
+    CHAT = 0
+    STEP = 1
+    BACKGROUND = 2
+
+# Shared by every AIService in the worker, so the provider sees bounded concurrency
+admission = AdmissionController(
+    "ai",
+    max_concurrency=settings.AI_MAX_CONCURRENCY,
+    queue_limits={
+        Priority.CHAT: settings.AI_MAX_QUEUE,
+        Priority.STEP: settings.AI_MAX_QUEUE // 2,
+        Priority.BACKGROUND: 0,
+    },
+    timeout=settings.AI_QUEUE_TIMEOUT_SECONDS,
+)
+
 class AIService:
     def __init__(self):
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = "gpt-4o-mini"
 
-    def _create_step_analysis_prompt(self, recipe: Dict[str, Any], step_number: int) -> str:
-        step = recipe["steps"][step_number]
+    def _create_step_analysis_prompt(self, step: str) -> str:
         return f"""You are an AI chef analyzing steps in a recipe. For this step, identify any required timers or temperature settings.
 Current step: "{step}"
 
@@ -128,16 +148,22 @@ Return your response in this JSON format:
 
     async def analyze_step(self, recipe: Dict[str, Any], step_number: int) -> List[Action]:
         """Analyze a recipe step and return suggested actions."""
-        prompt = self._create_step_analysis_prompt(recipe, step_number)
+        return await self.analyze_step_text(recipe["steps"][step_number])
+
+    async def analyze_step_text(self, step: str, priority: Priority = Priority.STEP) -> List[Action]:
+        """Suggested actions for a step; depends only on the step's text."""
+        prompt = self._create_step_analysis_prompt(step)
         
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful cooking assistant. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
+        async with admission.admit(priority):
+            with span("ai.analyze_step"):
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You are a helpful cooking assistant. Always respond with valid JSON only."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"}
+                )
 
         try:
             result = json.loads(response.choices[0].message.content)
@@ -159,14 +185,16 @@ Return your response in this JSON format:
         """Handle a user message and return a response with optional suggested actions."""
         prompt = self._create_chat_prompt(recipe, current_step, conversation_history, user_message)
         
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are Little Chef, a helpful cooking assistant. Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
+        async with admission.admit(Priority.CHAT):
+            with span("ai.chat"):
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You are Little Chef, a helpful cooking assistant. Always respond with valid JSON only."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"}
+                )
 
         try:
             result = json.loads(response.choices[0].message.content)
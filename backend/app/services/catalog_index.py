@@ -0,0 +1,574 @@
+"""
+In-memory, column-oriented index of the recipe catalog used by `/next`.
+
+Recipes are addressed by ordinal (their position in `ids`). Tags are kept both
+row-wise (CSR: which tags each recipe has, for scoring) and column-wise
+(posting lists: which recipes have each tag, for filtering); total time and
+servings are kept as sorted arrays so range filters are two binary searches.
+Filter masks are cached, so a session swiping with the same filters pays for
+building its mask once. Ingredient words are also posted per ingredient
+(`entry_*`: each distinct ingredient name of each recipe is one entry), which
+answers pantry search: which of a recipe's ingredients the pantry covers.
+
+The arrays are published as a versioned snapshot of `.npy` files under
+CATALOG_DIR and every worker maps them read-only, so the operating system
+shares one copy of the pages however many uvicorn workers run. One worker
+builds a new version (under a file lock) when the recipes table changes and
+atomically repoints `CURRENT` at it; the others notice the new pointer and
+remap it instead of rebuilding. Removing an old version is safe while
+workers still map it, because its pages live until the last mapping goes away.
+"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import Recipe
+from app.schemas.recipe import RecipeFilters
+from app.services import recipe_vectors
+from app.services.search import ingredient_tokens, normalize_ingredient
+from app.services.tag_vocabulary import vocabulary
+
+logger = logging.getLogger(__name__)
+
+# Every unseen recipe keeps at least this score so it can still be drawn
+MIN_SCORE = 0.1
+MASK_CACHE_SIZE = 256
+# Bumped when the arrays in a snapshot change, so older snapshots are rebuilt
+SNAPSHOT_FORMAT = 3
+# Versions kept on disk besides the current one, for workers that have not remapped yet
+KEEP_VERSIONS = 2
+
+_rng = np.random.default_rng()
+
+
+def _token_postings(token_postings: Dict[str, List[int]]):
+    """Sorted tokens and their (indptr, values) posting lists."""
+    tokens = sorted(token_postings)
+    indptr = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum([len(token_postings[token]) for token in tokens], out=indptr[1:])
+    values = np.fromiter(
+        (member for token in tokens for member in token_postings[token]),
+        dtype=np.int32, count=int(indptr[-1])
+    )
+    return (np.array(tokens, dtype="S") if tokens else np.empty(0, dtype="S1")), indptr, values
+
+
+def _intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Intersection of two sorted, duplicate-free arrays, by binary search of the shorter in the longer."""
+    if len(a) > len(b):
+        a, b = b, a
+    if not len(a):
+        return a
+    positions = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[positions] == a]
+
+
+def _postings(keys: np.ndarray, ordinals: np.ndarray, size: int):
+    """Group `ordinals` by `keys` into (indptr, values), like a CSC matrix."""
+    order = np.argsort(keys, kind="stable")
+    counts = np.bincount(keys, minlength=size)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, ordinals[order].astype(np.int32)
+
+
+class SortedColumn:
+    """An integer attribute sorted once, answering range queries with binary search."""
+
+    def __init__(self, order: np.ndarray, sorted_values: np.ndarray):
+        self.order = order
+        self.sorted = sorted_values
+
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> "SortedColumn":
+        order = np.argsort(values, kind="stable").astype(np.int32)
+        return cls(order, values[order])
+
+    def between(self, low: Optional[int], high: Optional[int]) -> np.ndarray:
+        # Unknown values are stored as -1 and never match a range
+        start = np.searchsorted(self.sorted, max(low or 0, 0), side="left")
+        end = np.searchsorted(self.sorted, high, side="right") if high is not None else len(self.sorted)
+        return self.order[start:end]
+
+
+class CatalogIndex:
+    # Arrays making up a snapshot; each is saved as `<name>.npy`
+    ARRAYS = (
+        "ids", "id_sorted", "id_order",
+        "tag_indptr", "tag_indices", "tag_rows", "tag_posting_indptr", "tag_posting_values",
+        "total_time_order", "total_time_sorted", "servings_order", "servings_sorted",
+        "ingredient_tokens", "ingredient_indptr", "ingredient_values",
+        "ingredient_counts", "entry_recipes", "entry_tokens", "entry_indptr", "entry_values",
+        "vectors", "ivf_centroids", "ivf_indptr", "ivf_values",
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        # Recipe ids as raw 16-byte UUIDs; `id_sorted`/`id_order` map ids back to ordinals
+        self.ids = arrays["ids"]
+        self.id_sorted = arrays["id_sorted"].view("S16").ravel()
+        self.id_order = arrays["id_order"]
+        self.size = len(self.ids)
+
+        # Row-wise tags (recipe -> tag ids) and the row of every entry, for bincount scoring
+        self.tag_indptr = arrays["tag_indptr"]
+        self.tag_indices = arrays["tag_indices"]
+        self.tag_rows = arrays["tag_rows"]
+        self.tag_count = len(arrays["tag_posting_indptr"]) - 1
+
+        # Column-wise tags (tag id -> recipes)
+        self.tag_postings = (arrays["tag_posting_indptr"], arrays["tag_posting_values"])
+
+        self.total_time = SortedColumn(arrays["total_time_order"], arrays["total_time_sorted"])
+        self.servings = SortedColumn(arrays["servings_order"], arrays["servings_sorted"])
+
+        # Ingredient word -> recipes, with the words sorted for binary search
+        self.ingredient_tokens = arrays["ingredient_tokens"]
+        self.ingredient_postings = (arrays["ingredient_indptr"], arrays["ingredient_values"])
+
+        # Distinct ingredients per recipe, and ingredient word -> entries (see the module docstring)
+        self.ingredient_counts = arrays["ingredient_counts"]
+        self.entry_recipes = arrays["entry_recipes"]
+        self.entry_tokens = arrays["entry_tokens"]
+        self.entry_postings = (arrays["entry_indptr"], arrays["entry_values"])
+
+        # Normalized recipe vectors, plus an IVF index over them for large catalogs
+        self.vectors = arrays["vectors"]
+        self.ivf_centroids = arrays["ivf_centroids"]
+        self.ivf_lists = (arrays["ivf_indptr"], arrays["ivf_values"])
+
+        self._mask_cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._mask_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, db: Session) -> "CatalogIndex":
+        vocabulary.refresh(db)
+        rows = db.query(
+            Recipe.id, Recipe.title, Recipe.tag_ids, Recipe.total_time, Recipe.servings, Recipe.ingredients
+        ).order_by(Recipe.id).yield_per(5000)
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "CatalogIndex":
+        """Index (id, title, tag_ids, total_time, servings, ingredients) rows, e.g. from a catalog snapshot."""
+        ids, tag_lengths, tag_chunks, times, servings = [], [], [], [], []
+        ingredient_counts, entry_recipes = [], []
+        token_postings: Dict[str, List[int]] = {}
+        entry_postings: Dict[str, List[int]] = {}
+        features = recipe_vectors.FeatureBuilder()
+
+        for ordinal, (recipe_id, title, tag_ids, total_time, recipe_servings, ingredients) in enumerate(rows):
+            ids.append(recipe_id.bytes)
+            tag_ids = tag_ids or []
+            tag_lengths.append(len(tag_ids))
+            tag_chunks.extend(tag_ids)
+            times.append(total_time if total_time and total_time > 0 else -1)
+            servings.append(recipe_servings if recipe_servings and recipe_servings > 0 else -1)
+            names = {normalize_ingredient(name) for name in (ingredients or {})}
+            ingredient_counts.append(len(names))
+            tokens = set()
+            for name in names:
+                entry = len(entry_recipes)
+                entry_recipes.append(ordinal)
+                for token in set(ingredient_tokens(name)):
+                    entry_postings.setdefault(token, []).append(entry)
+                    tokens.add(token)
+            for token in tokens:
+                token_postings.setdefault(token, []).append(ordinal)
+            features.add([
+                *(f"title:{word}" for word in ingredient_tokens(title or "")),
+                *(f"ingredient:{token}" for token in tokens),
+                *(f"tag:{tag_id}" for tag_id in tag_ids),
+            ])
+
+        size = len(ids)
+        id_bytes = np.frombuffer(b"".join(ids), dtype=np.uint8).reshape(size, 16)
+        id_order = np.argsort(id_bytes.view("S16").ravel(), kind="stable").astype(np.int32)
+
+        tag_indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.asarray(tag_lengths, dtype=np.int64), out=tag_indptr[1:])
+        tag_indices = np.asarray(tag_chunks, dtype=np.int32)
+        tag_rows = np.repeat(np.arange(size, dtype=np.int32), np.diff(tag_indptr))
+        tag_count = int(tag_indices.max()) + 1 if len(tag_indices) else 0
+        tag_posting_indptr, tag_posting_values = _postings(tag_indices, tag_rows, tag_count)
+
+        total_time = SortedColumn.from_values(np.asarray(times, dtype=np.int32))
+        servings_column = SortedColumn.from_values(np.asarray(servings, dtype=np.int32))
+
+        ingredient_tokens_sorted, ingredient_indptr, ingredient_values = _token_postings(token_postings)
+        entry_tokens, entry_indptr, entry_values = _token_postings(entry_postings)
+
+        vectors = features.vectors()
+        ivf_centroids, ivf_indptr, ivf_values = recipe_vectors.build_ivf(vectors)
+
+        return cls({
+            "ids": id_bytes,
+            "id_sorted": id_bytes[id_order],
+            "id_order": id_order,
+            "tag_indptr": tag_indptr,
+            "tag_indices": tag_indices,
+            "tag_rows": tag_rows,
+            "tag_posting_indptr": tag_posting_indptr,
+            "tag_posting_values": tag_posting_values,
+            "total_time_order": total_time.order,
+            "total_time_sorted": total_time.sorted,
+            "servings_order": servings_column.order,
+            "servings_sorted": servings_column.sorted,
+            "ingredient_tokens": ingredient_tokens_sorted,
+            "ingredient_indptr": ingredient_indptr,
+            "ingredient_values": ingredient_values,
+            "ingredient_counts": np.asarray(ingredient_counts, dtype=np.int32),
+            "entry_recipes": np.asarray(entry_recipes, dtype=np.int32),
+            "entry_tokens": entry_tokens,
+            "entry_indptr": entry_indptr,
+            "entry_values": entry_values,
+            "vectors": vectors,
+            "ivf_centroids": ivf_centroids,
+            "ivf_indptr": ivf_indptr,
+            "ivf_values": ivf_values,
+        })
+
+    def save(self, path: str) -> None:
+        os.makedirs(path)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), self.arrays[name], allow_pickle=False)
+
+    @classmethod
+    def load(cls, path: str) -> "CatalogIndex":
+        """Map a saved snapshot read-only; nothing is copied into this process."""
+        return cls({
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r", allow_pickle=False)
+            for name in cls.ARRAYS
+        })
+
+    def recipe_id(self, ordinal: int) -> UUID:
+        return UUID(bytes=self.ids[ordinal].tobytes())
+
+    def lookup(self, recipe_ids: Iterable[UUID]) -> np.ndarray:
+        """Ordinal of each recipe id, or -1 for ids not in the catalog."""
+        keys = np.array([recipe_id.bytes for recipe_id in recipe_ids], dtype="S16")
+        if not len(keys) or not self.size:
+            return np.full(len(keys), -1, dtype=np.int32)
+        positions = np.minimum(np.searchsorted(self.id_sorted, keys), self.size - 1)
+        return np.where(self.id_sorted[positions] == keys, self.id_order[positions], -1).astype(np.int32)
+
+    def ordinals_of(self, recipe_ids: Iterable[UUID]) -> np.ndarray:
+        """Ordinals of the given recipe ids, skipping ids not in the catalog."""
+        ordinals = self.lookup(recipe_ids)
+        return ordinals[ordinals >= 0]
+
+    def tag_ids_of(self, recipe_id: UUID) -> Optional[List[int]]:
+        ordinals = self.ordinals_of([recipe_id])
+        if not len(ordinals):
+            return None
+        ordinal = int(ordinals[0])
+        return self.tag_indices[self.tag_indptr[ordinal]:self.tag_indptr[ordinal + 1]].tolist()
+
+    def similarities(self, ordinal: int) -> np.ndarray:
+        """Cosine similarity of every recipe to the one at `ordinal`."""
+        return self.vectors @ self.vectors[ordinal]
+
+    def similar(self, recipe_id: UUID, k: int) -> List[tuple]:
+        """The `k` recipes most similar to `recipe_id` as (id, similarity), best first."""
+        ordinals = self.ordinals_of([recipe_id])
+        if not len(ordinals):
+            return []
+        ordinal = int(ordinals[0])
+        query = self.vectors[ordinal]
+
+        if len(self.ivf_centroids):
+            # Only score the lists whose centroids are nearest the query
+            indptr, values = self.ivf_lists
+            probes = recipe_vectors.top_k(self.ivf_centroids @ query, recipe_vectors.IVF_PROBES)
+            candidates = np.concatenate([values[indptr[probe]:indptr[probe + 1]] for probe in probes])
+        else:
+            candidates = np.arange(self.size, dtype=np.int32)
+        candidates = candidates[candidates != ordinal]
+        scores = self.vectors[candidates] @ query
+        best = recipe_vectors.top_k(scores, k)
+        return [(self.recipe_id(int(candidates[i])), float(scores[i])) for i in best]
+
+    def _tag_members(self, tag_id: Optional[int]) -> np.ndarray:
+        if tag_id is None or tag_id >= self.tag_count:
+            return np.empty(0, dtype=np.int32)
+        indptr, values = self.tag_postings
+        return values[indptr[tag_id]:indptr[tag_id + 1]]
+
+    @staticmethod
+    def _posted_with_all(ingredient: str, tokens: np.ndarray, postings: tuple) -> Optional[np.ndarray]:
+        """Members posted under every word of `ingredient`; None if it has no words."""
+        members = None
+        indptr, values = postings
+        for token in ingredient_tokens(ingredient):
+            key = token.encode()
+            position = int(np.searchsorted(tokens, key))
+            if position >= len(tokens) or tokens[position] != key:
+                return np.empty(0, dtype=np.int32)
+            posted = values[indptr[position]:indptr[position + 1]]
+            # Posting lists are in ascending order
+            members = posted if members is None else _intersect_sorted(members, posted)
+        return members
+
+    def _ingredient_members(self, ingredient: str) -> Optional[np.ndarray]:
+        """Recipes having every word of `ingredient` in some ingredient name; None if it has no words."""
+        return self._posted_with_all(ingredient, self.ingredient_tokens, self.ingredient_postings)
+
+    def pantry(self, have: Iterable[str], max_missing: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ordinals of recipes needing at most `max_missing` ingredients beyond
+        `have`, fewest missing first then by the share of ingredients covered,
+        with that share. An ingredient is covered by an item of `have` whose
+        words it all contains.
+        """
+        covered = np.zeros(len(self.entry_recipes), dtype=bool)
+        for item in have:
+            entries = self._posted_with_all(item, self.entry_tokens, self.entry_postings)
+            if entries is not None:
+                covered[entries] = True
+        # flatnonzero then gather is several times faster than boolean indexing here
+        matched = np.bincount(self.entry_recipes[np.flatnonzero(covered)], minlength=self.size)
+        missing = self.ingredient_counts - matched
+        candidates = np.flatnonzero((matched > 0) & (missing <= max_missing))
+        share = matched[candidates] / self.ingredient_counts[candidates]
+        # lexsort's last key is the primary one; ties keep ordinal (id) order
+        order = np.lexsort((candidates, -share, missing[candidates]))
+        return candidates[order].astype(np.int32), share[order]
+
+    def _member_mask(self, members: np.ndarray) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        mask[members] = True
+        return mask
+
+    def filter_mask(self, filters: Optional[RecipeFilters]) -> Optional[np.ndarray]:
+        """Boolean mask of recipes matching `filters`, or None when nothing is filtered."""
+        if filters is None or filters.is_empty():
+            return None
+        key = filters.cache_key()
+        with self._mask_lock:
+            mask = self._mask_cache.get(key)
+            if mask is not None:
+                self._mask_cache.move_to_end(key)
+                return mask
+
+        mask = np.ones(self.size, dtype=bool)
+        if filters.min_total_time is not None or filters.max_total_time is not None:
+            mask &= self._member_mask(self.total_time.between(filters.min_total_time, filters.max_total_time))
+        if filters.min_servings is not None or filters.max_servings is not None:
+            mask &= self._member_mask(self.servings.between(filters.min_servings, filters.max_servings))
+        for tag in filters.include_tags:
+            mask &= self._member_mask(self._tag_members(vocabulary.id_for(tag)))
+        for tag in filters.exclude_tags:
+            mask[self._tag_members(vocabulary.id_for(tag))] = False
+        for ingredient in filters.include_ingredients:
+            members = self._ingredient_members(ingredient)
+            if members is not None:
+                mask &= self._member_mask(members)
+        for ingredient in filters.exclude_ingredients:
+            members = self._ingredient_members(ingredient)
+            if members is not None:
+                mask[members] = False
+
+        with self._mask_lock:
+            self._mask_cache[key] = mask
+            if len(self._mask_cache) > MASK_CACHE_SIZE:
+                self._mask_cache.popitem(last=False)
+        return mask
+
+    def scores(self, weight_table: Sequence[float]) -> np.ndarray:
+        """Sum of tag weights for every recipe, as one gather and one bincount."""
+        if not len(weight_table) or not len(self.tag_indices):
+            return np.zeros(self.size, dtype=np.float64)
+        weights = np.zeros(max(self.tag_count, len(weight_table)), dtype=np.float64)
+        weights[:len(weight_table)] = weight_table
+        return np.bincount(self.tag_rows, weights=weights[self.tag_indices], minlength=self.size)
+
+    def sample(
+        self,
+        weight_table: Sequence[float],
+        exclude: Iterable[UUID] = (),
+        filters: Optional[RecipeFilters] = None,
+        similar_to: Optional[UUID] = None,
+        similarity_boost: float = 0.0,
+        prior: Optional[np.ndarray] = None,
+    ) -> Optional[UUID]:
+        """
+        Draw a recipe with probability proportional to its (floored) score,
+        optionally adding a per-recipe `prior` and `similarity_boost` times its
+        similarity to `similar_to`.
+        """
+        if not self.size:
+            return None
+        scores = self.scores(weight_table)
+        if prior is not None:
+            scores += prior
+        if similar_to is not None and similarity_boost:
+            ordinals = self.ordinals_of([similar_to])
+            if len(ordinals):
+                scores += similarity_boost * np.maximum(self.similarities(int(ordinals[0])), 0.0)
+        probabilities = np.maximum(scores, MIN_SCORE)
+
+        mask = self.filter_mask(filters)
+        if mask is not None:
+            probabilities[~mask] = 0.0
+        probabilities[self.ordinals_of(exclude)] = 0.0
+
+        cumulative = np.cumsum(probabilities)
+        total = cumulative[-1]
+        if total <= 0:
+            return None
+        ordinal = int(np.searchsorted(cumulative, _rng.random() * total, side="right"))
+        return self.recipe_id(min(ordinal, self.size - 1))
+
+
+class Catalog:
+    """
+    Maps the current published CatalogIndex snapshot, building a new version
+    when the recipes table changes.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._index: Optional[CatalogIndex] = None
+        self._version: Optional[str] = None
+        self._fingerprint = None
+        self._build_lock = threading.Lock()
+
+    def _current_fingerprint(self, db: Session) -> list:
+        count, last_updated = db.query(func.count(Recipe.id), func.max(Recipe.last_updated)).one()
+        # Stored in the snapshot manifest, so keep it JSON-comparable
+        return [count, last_updated.isoformat() if last_updated else None]
+
+    def _matches(self, published: Optional[dict], fingerprint: list) -> bool:
+        return (
+            published is not None
+            and published.get("format") == SNAPSHOT_FORMAT
+            and published["fingerprint"] == fingerprint
+        )
+
+    def _published(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.root, "CURRENT")) as f:
+                version = f.read().strip()
+            with open(os.path.join(self.root, version, "manifest.json")) as f:
+                return {"version": version, **json.load(f)}
+        except FileNotFoundError:
+            return None
+
+    def _map(self, published: dict) -> None:
+        index = CatalogIndex.load(os.path.join(self.root, published["version"]))
+        self._index, self._version, self._fingerprint = index, published["version"], published["fingerprint"]
+        logger.info(
+            "Mapped catalog index",
+            extra={"version": published["version"], "recipes": index.size, "tags": index.tag_count}
+        )
+
+    def _publish(self, index: CatalogIndex, fingerprint: list) -> dict:
+        version = f"v{time.time_ns()}"
+        staging = os.path.join(self.root, f".{version}.tmp")
+        index.save(staging)
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump({"format": SNAPSHOT_FORMAT, "fingerprint": fingerprint, "recipes": index.size}, f)
+        os.rename(staging, os.path.join(self.root, version))
+
+        pointer = os.path.join(self.root, f".CURRENT.{os.getpid()}.tmp")
+        with open(pointer, "w") as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(self.root, "CURRENT"))
+        self._prune(version)
+        logger.info("Published catalog index", extra={"version": version, "recipes": index.size, "tags": index.tag_count})
+        return {"version": version, "format": SNAPSHOT_FORMAT, "fingerprint": fingerprint}
+
+    def _prune(self, current: str) -> None:
+        versions = sorted(
+            name for name in os.listdir(self.root)
+            if name.startswith("v") and name != current
+        )
+        for name in versions[:-KEEP_VERSIONS]:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def get(self, db: Session) -> CatalogIndex:
+        if self._index is None:
+            self.refresh(db)
+        return self._index
+
+    async def aget(self, db: Session) -> CatalogIndex:
+        """`get` for async handlers: a first build (and its file lock) runs off the event loop."""
+        index = self._index
+        if index is not None:
+            return index
+        return await run_in_threadpool(self.get, db)
+
+    def refresh(self, db: Session) -> bool:
+        """Map the snapshot matching the recipes table, building it if needed; True if remapped."""
+        with self._build_lock:
+            fingerprint = self._current_fingerprint(db)
+            if self._index is not None and fingerprint == self._fingerprint:
+                return False
+
+            # Another worker may already have published this version
+            published = self._published()
+            if not self._matches(published, fingerprint):
+                os.makedirs(self.root, exist_ok=True)
+                with open(os.path.join(self.root, ".lock"), "w") as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    try:
+                        published = self._published()
+                        if not self._matches(published, fingerprint):
+                            published = self._publish(CatalogIndex.build(db), fingerprint)
+                    finally:
+                        fcntl.flock(lock, fcntl.LOCK_UN)
+
+            if published["version"] == self._version:
+                self._fingerprint = fingerprint
+                return False
+            self._map(published)
+        return True
+
+    def publish(self, db: Session, index: CatalogIndex) -> None:
+        """
+        Publish an index built elsewhere (e.g. from the snapshot a database was
+        just imported from) as the one for the recipes table as it is now, so
+        workers map it instead of scanning the table.
+        """
+        fingerprint = self._current_fingerprint(db)
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._publish(index, fingerprint)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _refresh_with_new_session(self) -> None:
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
+
+    async def run_refresher(self, interval: float) -> None:
+        # The first pass warms the index at startup, so requests rarely have to wait for it
+        while True:
+            try:
+                await run_in_threadpool(self._refresh_with_new_session)
+            except Exception:
+                logger.exception("Catalog index refresh failed")
+            await asyncio.sleep(interval)
+
+
+catalog = Catalog(settings.CATALOG_DIR)
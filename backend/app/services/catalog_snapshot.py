@@ -0,0 +1,319 @@
+"""
+Bulk export and import of the recipe catalog as a gzipped NDJSON snapshot.
+
+A snapshot is one JSON document per line: a header, the tag dictionary
+(`{"tag": ...}`), recipes with their MinHash signature and LSH buckets
+(`{"recipe": ...}`), dedup aliases (`{"alias": ...}`) and a footer with the
+row counts, which makes a truncated file fail to import.
+
+Both directions stream through Postgres COPY, so memory stays flat however
+large the catalog is: the server renders each row as JSON for export, and on
+import the lines are copied into a temporary table and unpacked with
+set-based INSERTs. Tags are matched by name, so a snapshot can be imported
+into a database whose tag ids differ. Recipes are upserted by id and rows
+whose hash is unchanged are left alone; search columns are backfilled after.
+
+The import is one long transaction, but delta sync only trusts versions
+stamped shortly before their commit (see app.services.catalog_sync), so the
+upserted recipes are re-stamped by the last statement before the commit.
+
+The same file can also build the in-memory recommendation index without
+scanning the recipes table (`import --publish-index`).
+
+Example:
+
+    python -m app.services.catalog_snapshot export catalog.ndjson.gz
+    python -m app.services.catalog_snapshot import catalog.ndjson.gz --publish-index
+"""
+import argparse
+import gzip
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional
+from uuid import UUID
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.log import configure_logging
+from app.models import Recipe
+from app.services.catalog_index import CatalogIndex, catalog
+from app.services.search import backfill_search_columns
+
+logger = logging.getLogger(__name__)
+
+FORMAT = "little-chef-catalog"
+VERSION = 1
+
+# One unquoted CSV column per line: JSON never contains these raw control
+# characters, so COPY passes each line through untouched
+_COPY_OPTIONS = "(FORMAT csv, QUOTE e'\\x01', DELIMITER e'\\x02')"
+
+_EXPORT_QUERIES = {
+    "tags": """
+        SELECT json_build_object('tag', json_build_object('id', id, 'name', name))
+        FROM tags ORDER BY id
+    """,
+    "recipes": """
+        SELECT json_build_object('recipe', json_build_object(
+            'id', r.id, 'title', r.title, 'ingredients', r.ingredients, 'steps', r.steps,
+            'source_url', r.source_url, 'images', r.images, 'total_time', r.total_time,
+            'servings', r.servings, 'tag_ids', r.tag_ids, 'hash', r.hash,
+            'ingredient_names', r.ingredient_names, 'minhash', encode(r.minhash, 'hex'),
+            'lsh', (SELECT json_agg(json_build_array(b.band, b.bucket)) FROM recipe_lsh_bands b WHERE b.recipe_id = r.id)
+        ))
+        FROM recipes r ORDER BY r.id
+    """,
+    "aliases": """
+        SELECT json_build_object('alias', json_build_object(
+            'source_url', source_url, 'recipe_id', recipe_id, 'similarity', similarity
+        ))
+        FROM recipe_aliases ORDER BY source_url
+    """,
+}
+
+
+def _elements(field: str) -> str:
+    """SQL for the elements of a JSON array field of `r`, with their positions; null has none."""
+    return f"""json_array_elements_text(
+        CASE WHEN json_typeof(r->'{field}') = 'array' THEN r->'{field}' ELSE '[]' END
+    ) WITH ORDINALITY AS a(e, n)"""
+
+
+def _array(field: str) -> str:
+    """SQL for a JSON array field of `r` as a Postgres array, in order."""
+    return f"ARRAY(SELECT e FROM {_elements(field)} ORDER BY n)"
+
+
+_IMPORT_SQL = [
+    # json, not jsonb: jsonb would reorder each recipe's ingredient keys
+    "CREATE TEMPORARY TABLE snapshot_rows (doc json) ON COMMIT DROP",
+    "COPY snapshot_rows FROM STDIN WITH " + _COPY_OPTIONS,
+    "CREATE TEMPORARY TABLE snapshot_changed (id uuid PRIMARY KEY) ON COMMIT DROP",
+    """
+    INSERT INTO tags (name)
+    SELECT doc->'tag'->>'name' FROM snapshot_rows WHERE doc->'tag' IS NOT NULL
+    ON CONFLICT (name) DO NOTHING
+    """,
+    """
+    CREATE TEMPORARY TABLE snapshot_tag_map ON COMMIT DROP AS
+    SELECT (s.doc->'tag'->>'id')::int AS old_id, t.id AS new_id
+    FROM snapshot_rows s JOIN tags t ON t.name = s.doc->'tag'->>'name'
+    WHERE s.doc->'tag' IS NOT NULL
+    """,
+    f"""
+    WITH upserted AS (
+        INSERT INTO recipes (
+            id, title, ingredients, steps, source_url, images, total_time, servings,
+            tag_ids, hash, ingredient_names, minhash
+        )
+        SELECT
+            (r->>'id')::uuid, r->>'title', r->'ingredients', {_array('steps')}, r->>'source_url',
+            {_array('images')}, (r->>'total_time')::int, (r->>'servings')::int,
+            ARRAY(
+                SELECT m.new_id FROM {_elements('tag_ids')}
+                JOIN snapshot_tag_map m ON m.old_id = a.e::int ORDER BY n
+            ),
+            r->>'hash', {_array('ingredient_names')}, decode(r->>'minhash', 'hex')
+        FROM (SELECT doc->'recipe' AS r FROM snapshot_rows WHERE doc->'recipe' IS NOT NULL) s
+        ON CONFLICT (id) DO UPDATE SET
+            title = EXCLUDED.title, ingredients = EXCLUDED.ingredients, steps = EXCLUDED.steps,
+            source_url = EXCLUDED.source_url, images = EXCLUDED.images, total_time = EXCLUDED.total_time,
+            servings = EXCLUDED.servings, tag_ids = EXCLUDED.tag_ids, hash = EXCLUDED.hash,
+            ingredient_names = EXCLUDED.ingredient_names, minhash = EXCLUDED.minhash, search_vector = NULL
+        WHERE recipes.hash IS DISTINCT FROM EXCLUDED.hash
+        RETURNING id
+    )
+    INSERT INTO snapshot_changed SELECT id FROM upserted
+    """,
+    """
+    DELETE FROM recipe_lsh_bands WHERE recipe_id IN (
+        SELECT (doc->'recipe'->>'id')::uuid FROM snapshot_rows WHERE doc->'recipe' IS NOT NULL
+    )
+    """,
+    """
+    INSERT INTO recipe_lsh_bands (band, bucket, recipe_id)
+    SELECT (b->>0)::smallint, (b->>1)::bigint, (s.doc->'recipe'->>'id')::uuid
+    FROM snapshot_rows s, json_array_elements(
+        CASE WHEN json_typeof(s.doc->'recipe'->'lsh') = 'array' THEN s.doc->'recipe'->'lsh' ELSE '[]' END
+    ) AS b
+    WHERE s.doc->'recipe' IS NOT NULL
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO recipe_aliases (source_url, recipe_id, similarity)
+    SELECT doc->'alias'->>'source_url', (doc->'alias'->>'recipe_id')::uuid, (doc->'alias'->>'similarity')::float
+    FROM snapshot_rows
+    WHERE doc->'alias' IS NOT NULL
+      AND (doc->'alias'->>'recipe_id')::uuid IN (SELECT id FROM recipes)
+    ON CONFLICT (source_url) DO NOTHING
+    """,
+    # Last, so the changed recipes' versions are only seconds older than the commit
+    """
+    UPDATE recipes r SET sync_version = nextval('recipe_sync_version_seq')
+    FROM snapshot_changed c WHERE r.id = c.id
+    """,
+]
+
+
+# Line prefixes of each kind of row, as rendered by json_build_object
+_KINDS = (("tags", b'{"tag"'), ("recipes", b'{"recipe"'), ("aliases", b'{"alias"'))
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _LineCounter:
+    """File object for COPY TO that compresses what it is given and counts rows."""
+
+    def __init__(self, out):
+        self.out = out
+        self.lines = 0
+
+    def write(self, data: bytes) -> None:
+        self.lines += data.count(b"\n")
+        self.out.write(data)
+
+
+class _SnapshotReader:
+    """File object for COPY FROM over a snapshot's body lines, checking its header and footer."""
+
+    def __init__(self, f):
+        self.f = f
+        self.header = self._document(f.readline())
+        if self.header.get("format") != FORMAT or self.header.get("version") != VERSION:
+            raise SnapshotError("Not a catalog snapshot, or an unsupported version")
+        self.counts: Dict[str, int] = {"tags": 0, "recipes": 0, "aliases": 0}
+        self.footer: Optional[dict] = None
+
+    @staticmethod
+    def _document(line: bytes) -> dict:
+        try:
+            return json.loads(line)
+        except ValueError:
+            raise SnapshotError("Snapshot is corrupt") from None
+
+    def read(self, size: int = 8192) -> bytes:
+        lines = []
+        length = 0
+        while length < size and self.footer is None:
+            line = self.f.readline()
+            if not line:
+                raise SnapshotError("Snapshot is truncated")
+            if line.startswith(b'{"end"'):
+                self.footer = self._document(line)["end"]
+                break
+            for kind, key in _KINDS:
+                if line.startswith(key):
+                    self.counts[kind] += 1
+                    break
+            lines.append(line)
+            length += len(line)
+        return b"".join(lines)
+
+
+def export_snapshot(db: Session, path: str) -> Dict[str, int]:
+    """Write the catalog to `path`; returns row counts."""
+    # One snapshot of the database for all three queries, so aliases match the recipes
+    cursor = db.connection(execution_options={"isolation_level": "REPEATABLE READ"}).connection.cursor()
+    counts = {}
+    with gzip.open(path, "wb", compresslevel=6) as out:
+        header = {"format": FORMAT, "version": VERSION, "exported_at": datetime.now(timezone.utc).isoformat()}
+        out.write(json.dumps(header).encode() + b"\n")
+        for kind, query in _EXPORT_QUERIES.items():
+            writer = _LineCounter(out)
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH {_COPY_OPTIONS}", writer)
+            counts[kind] = writer.lines
+        out.write(json.dumps({"end": counts}).encode() + b"\n")
+    db.rollback()
+    logger.info("Exported catalog snapshot", extra={"path": path, **counts})
+    return counts
+
+
+def import_snapshot(db: Session, path: str) -> Dict[str, int]:
+    """Upsert the catalog in `path` in one transaction; returns row counts."""
+    cursor = db.connection().connection.cursor()
+    with gzip.open(path, "rb") as f:
+        reader = _SnapshotReader(f)
+        cursor.execute(_IMPORT_SQL[0])
+        cursor.copy_expert(_IMPORT_SQL[1], reader)
+        if reader.footer != reader.counts:
+            raise SnapshotError(f"Snapshot footer {reader.footer} does not match its contents {reader.counts}")
+        for statement in _IMPORT_SQL[2:]:
+            cursor.execute(statement)
+    db.commit()
+    backfill_search_columns(db)
+    logger.info("Imported catalog snapshot", extra={"path": path, **reader.counts})
+    return reader.counts
+
+
+def index_rows(db: Session, path: str) -> Iterator[tuple]:
+    """(id, title, tag_ids, total_time, servings, ingredients) rows for CatalogIndex, with this database's tag ids."""
+    tag_ids = dict(db.execute(text("SELECT name, id FROM tags")).all())
+    snapshot_tags = {}
+    with gzip.open(path, "rb") as f:
+        _SnapshotReader(f)  # validates the header
+        for line in f:
+            document = json.loads(line)
+            if "tag" in document:
+                snapshot_tags[document["tag"]["id"]] = tag_ids.get(document["tag"]["name"])
+            elif "recipe" in document:
+                recipe = document["recipe"]
+                yield (
+                    UUID(recipe["id"]),
+                    recipe["title"],
+                    [snapshot_tags[tag_id] for tag_id in recipe["tag_ids"] or [] if snapshot_tags.get(tag_id) is not None],
+                    recipe["total_time"],
+                    recipe["servings"],
+                    recipe["ingredients"],
+                )
+
+
+def publish_index(db: Session, path: str, expected_recipes: int) -> bool:
+    """Publish the recommendation index built from `path`, if the snapshot is the whole catalog."""
+    recipes = db.query(func.count(Recipe.id)).scalar()
+    if recipes != expected_recipes:
+        logger.warning(
+            "Database has recipes beyond the snapshot; workers will build the index from the table",
+            extra={"recipes": recipes, "snapshot_recipes": expected_recipes}
+        )
+        return False
+    catalog.publish(db, CatalogIndex.from_rows(index_rows(db, path)))
+    return True
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export or import the recipe catalog")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export", help="Write the catalog to a snapshot").add_argument("path")
+    import_parser = commands.add_parser("import", help="Upsert a snapshot into the database")
+    import_parser.add_argument("path")
+    import_parser.add_argument(
+        "--publish-index", action="store_true",
+        help=f"Also publish the recommendation index built from the snapshot to {settings.CATALOG_DIR}"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    configure_logging(settings.LOG_LEVEL)
+    db = SessionLocal()
+    try:
+        if args.command == "export":
+            counts = export_snapshot(db, args.path)
+        else:
+            counts = import_snapshot(db, args.path)
+            if args.publish_index:
+                publish_index(db, args.path, counts["recipes"])
+    finally:
+        db.close()
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Delta sync of the recipe catalog for clients that keep a local copy.
+
+Every visible change to a recipe takes the next value of one database
+sequence as its `sync_version` (a trigger on `recipes`), and every deletion
+leaves a tombstone numbered from the same sequence. A client stores the
+highest version it has applied and asks for everything after it, so one
+integer watermark covers inserts, updates and deletions in commit-agnostic
+order.
+
+Sequence values are handed out before their transactions commit, so a client
+could otherwise skip a change that committed after a higher-numbered one it
+already received. Changes are therefore only served once they are at least
+SYNC_SETTLE_SECONDS old, and a batch stops at the first change that is not:
+a writer that commits within that window of its change can never be skipped.
+
+That bounds how long any write transaction may run after stamping a recipe.
+Long bulk writers (the snapshot import) re-stamp their rows in one final
+statement before committing, by setting `sync_version` explicitly, which the
+trigger always honours with a fresh version. That statement itself must still
+finish within the window, so very large imports should be split into several
+snapshots.
+"""
+from datetime import timedelta
+from typing import List
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, defer
+
+from app.core.config import settings
+from app.models import Recipe, RecipeTombstone
+from app.services.recipe_payload import recipe_content
+
+
+def changes(db: Session, since: int, limit: int) -> dict:
+    """Recipes changed and ids deleted after version `since`, oldest first, at most `limit` entries."""
+    cutoff = db.execute(select(func.clock_timestamp())).scalar() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    recipes = (
+        db.query(Recipe)
+        .options(defer(Recipe.search_vector), defer(Recipe.minhash), defer(Recipe.ingredient_names))
+        .filter(Recipe.sync_version > since)
+        .order_by(Recipe.sync_version)
+        .limit(limit + 1)
+        .all()
+    )
+    tombstones = (
+        db.query(RecipeTombstone)
+        .filter(RecipeTombstone.sync_version > since)
+        .order_by(RecipeTombstone.sync_version)
+        .limit(limit + 1)
+        .all()
+    )
+    entries = sorted(
+        [(recipe.sync_version, recipe.last_updated, recipe) for recipe in recipes]
+        + [(tombstone.sync_version, tombstone.deleted_at, tombstone) for tombstone in tombstones],
+        key=lambda entry: entry[0],
+    )
+
+    changed: List[dict] = []
+    deleted: List = []
+    version = since
+    has_more = False
+    for entry_version, changed_at, row in entries:
+        if changed_at >= cutoff:
+            # Not settled yet; the client picks it up on its next poll
+            break
+        if len(changed) + len(deleted) == limit:
+            has_more = True
+            break
+        if isinstance(row, Recipe):
+            changed.append(recipe_content(db, row))
+        else:
+            deleted.append(row.recipe_id)
+        version = entry_version
+
+    return {"since": since, "version": version, "has_more": has_more, "recipes": changed, "deleted": deleted}
@@ -0,0 +1,144 @@
+"""
+Near-duplicate recipe detection with MinHash and locality-sensitive hashing.
+
+A recipe's shingles are the words of its normalized ingredient names plus
+word trigrams of its steps. Its MinHash signature (NUM_PERMUTATIONS 32-bit
+minima) estimates the Jaccard similarity of two shingle sets as the fraction
+of positions where their signatures agree. The signature is cut into BANDS
+bands of ROWS_PER_BAND values and every band is hashed into a bucket stored in
+`recipe_lsh_bands`; recipes sharing any bucket are candidates, so a lookup is
+one indexed query no matter how large the catalog is. Candidates are then
+confirmed against their stored signatures with DUPLICATE_THRESHOLD.
+
+With 16 bands of 8 rows, pairs at Jaccard 0.9 become candidates >99.9% of the
+time, at 0.8 ~95% of the time and at 0.4 ~1% of the time.
+
+A recipe with no shingles (no ingredient or step words) has no signature: it
+is stored with an empty `minhash`, gets no buckets and is never merged, since
+all such recipes would otherwise look identical.
+"""
+import hashlib
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Recipe, RecipeLSHBand
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+DUPLICATE_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_permutations = np.random.default_rng(1).integers(1, 1 << 31, size=(2, NUM_PERMUTATIONS), dtype=np.uint64)
+_A, _B = _permutations[0], _permutations[1]
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def shingles(ingredient_names: Iterable[str], steps: Sequence[str]) -> set:
+    """Ingredient words and step word-trigrams; formatting and ingredient order do not matter."""
+    result = {f"i:{word}" for name in ingredient_names for word in _WORD.findall(name.lower())}
+    for step in steps:
+        words = _WORD.findall(step.lower())
+        result.update(f"s:{' '.join(words[i:i + 3])}" for i in range(max(len(words) - 2, 1)) if words)
+    return result
+
+
+def _hash32(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little")
+
+
+def signature(shingle_set: Iterable[str]) -> Optional[np.ndarray]:
+    """MinHash signature of a shingle set, as NUM_PERMUTATIONS uint32 values; None if the set is empty."""
+    hashes = np.fromiter((_hash32(shingle) for shingle in shingle_set), dtype=np.uint64)
+    if not len(hashes):
+        return None
+    # (a * x + b) mod p per permutation; a, x < 2^32 so the product fits in 64 bits
+    permuted = (np.outer(hashes, _A) + _B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def recipe_signature(ingredients: Dict[str, str], steps: Sequence[str]) -> Optional[np.ndarray]:
+    return signature(shingles(ingredients.keys(), steps))
+
+
+def band_buckets(sig: np.ndarray) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs for a signature; bucket is a signed 64-bit hash of the band's rows."""
+    return [
+        (band, int.from_bytes(
+            hashlib.blake2b(sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND].tobytes(), digest_size=8).digest(),
+            "little", signed=True
+        ))
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.mean(a == b))
+
+
+def find_duplicate(db: Session, sig: Optional[np.ndarray], exclude: Optional[UUID] = None) -> Optional[Tuple[UUID, float]]:
+    """The most similar indexed recipe at or above DUPLICATE_THRESHOLD, as (id, similarity)."""
+    if sig is None:
+        return None
+    candidates = (
+        db.query(Recipe.id, Recipe.minhash)
+        .join(RecipeLSHBand, RecipeLSHBand.recipe_id == Recipe.id)
+        .filter(tuple_(RecipeLSHBand.band, RecipeLSHBand.bucket).in_(band_buckets(sig)))
+        .distinct()
+        .all()
+    )
+    best = None
+    for recipe_id, minhash in candidates:
+        if recipe_id == exclude or not minhash:
+            continue
+        score = similarity(sig, np.frombuffer(minhash, dtype=np.uint32))
+        if score >= DUPLICATE_THRESHOLD and (best is None or score > best[1]):
+            best = (recipe_id, score)
+    return best
+
+
+def index_recipe(db: Session, recipe_id: UUID, sig: Optional[np.ndarray]) -> None:
+    """Store a recipe's signature and (re)place its LSH buckets; the caller commits."""
+    # An empty minhash marks a recipe without a signature, so the backfill skips it
+    minhash = sig.tobytes() if sig is not None else b""
+    db.query(Recipe).filter(Recipe.id == recipe_id).update({Recipe.minhash: minhash}, synchronize_session=False)
+    db.query(RecipeLSHBand).filter(RecipeLSHBand.recipe_id == recipe_id).delete(synchronize_session=False)
+    if sig is None:
+        return
+    db.execute(
+        insert(RecipeLSHBand)
+        .values([{"band": band, "bucket": bucket, "recipe_id": recipe_id} for band, bucket in band_buckets(sig)])
+        .on_conflict_do_nothing()
+    )
+
+
+def backfill_signatures(db: Session, batch_size: int = 1000) -> int:
+    """Index recipes that have no signature yet (e.g. scraped before dedup existed); returns rows indexed."""
+    total = 0
+    while True:
+        rows = (
+            db.query(Recipe.id, Recipe.ingredients, Recipe.steps)
+            .filter(Recipe.minhash.is_(None))
+            .limit(batch_size)
+            .all()
+        )
+        for recipe_id, ingredients, steps in rows:
+            index_recipe(db, recipe_id, recipe_signature(ingredients or {}, steps or []))
+        db.commit()
+        total += len(rows)
+        if len(rows) < batch_size:
+            if total:
+                logger.info("Backfilled recipe signatures", extra={"recipes": total})
+            return total
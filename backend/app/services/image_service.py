@@ -0,0 +1,253 @@
+"""
+Fetch-once image proxy producing resized, recompressed variants of recipe images.
+
+Files on disk are content-addressed: a source image is stored under the
+SHA-256 of its bytes and its variants under `<source digest>-<size>.<format>`,
+so the same photo referenced by several recipes is fetched and encoded once.
+A small `urls/` entry maps each source URL to its digest, so a cached variant
+is served without reading its source. The cache is kept under
+IMAGE_CACHE_MAX_BYTES by evicting the least recently served files; hits
+refresh a file's mtime, which is the LRU clock.
+
+Proxied URLs carry a version derived from the source URL (`image_version`),
+so a recipe whose image changes gets a new proxy URL rather than stale bytes
+from browser caches.
+"""
+import hashlib
+import io
+import logging
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import httpx
+from fastapi.concurrency import run_in_threadpool
+from PIL import Image, features
+
+from app.core.concurrency import SingleFlight
+from app.core.config import settings
+from app.core.metrics import registry, span
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each size variant
+VARIANTS = {
+    "card": 750,
+    "thumbnail": 240,
+}
+
+FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 60}),
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Best first; formats this Pillow build cannot encode are skipped
+_PREFERENCE = [fmt for fmt in ("avif", "webp") if features.check(fmt)]
+
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+
+CACHE_HITS = registry.counter("image_cache_hits_total", "Image variants served from disk")
+CACHE_MISSES = registry.counter("image_cache_misses_total", "Image variants generated")
+CACHE_EVICTIONS = registry.counter("image_cache_evictions_total", "Files evicted from the image cache")
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    accept = accept or ""
+    for fmt in _PREFERENCE:
+        if FORMATS[fmt][1] in accept:
+            return fmt
+    return "jpeg"
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _render(source: bytes, max_edge: int, fmt: str) -> bytes:
+    pil_format, _, options = FORMATS[fmt]
+    with Image.open(io.BytesIO(source)) as image:
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        out = io.BytesIO()
+        image.save(out, pil_format, **options)
+        return out.getvalue()
+
+
+async def _download(client: httpx.AsyncClient, url: str) -> bytes:
+    """Body of `url`, read no further than MAX_SOURCE_BYTES."""
+    async with client.stream("GET", url) as response:
+        if response.status_code != 200:
+            raise ImageFetchError(f"Could not fetch {url}: HTTP {response.status_code}")
+        length = response.headers.get("content-length")
+        if length and length.isdigit() and int(length) > MAX_SOURCE_BYTES:
+            raise ImageFetchError(f"Image at {url} is too large")
+        chunks, received = [], 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > MAX_SOURCE_BYTES:
+                raise ImageFetchError(f"Image at {url} is too large")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class ImageCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        for sub in ("urls", "sources", "variants"):
+            os.makedirs(os.path.join(root, sub), exist_ok=True)
+        self._size: Optional[int] = None
+        self._size_lock = threading.Lock()
+        self._inflight = SingleFlight()
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.root, *parts)
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return data
+
+    def _write(self, path: str, data: bytes) -> None:
+        # Write then rename so readers never see a partial file
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._account(len(data))
+
+    def _account(self, added: int) -> None:
+        with self._size_lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += added
+            if self._size <= self.max_bytes:
+                return
+            # Evict least recently used files down to 90% of the budget
+            target = self.max_bytes * 0.9
+            for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+                if self._size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                self._size -= size
+                CACHE_EVICTIONS.inc()
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        entries = []
+        for sub in ("sources", "variants"):
+            with os.scandir(self._path(sub)) as it:
+                for entry in it:
+                    if entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _url_entry(self, url: str) -> str:
+        return self._path("urls", _digest(url.encode()))
+
+    def _known_digest(self, url: str) -> Optional[str]:
+        """Digest of the source image at `url`, if it was fetched before."""
+        digest = self._read(self._url_entry(url))
+        return digest.decode() if digest else None
+
+    def _cached_variant(self, path: str) -> bool:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def _source(self, url: str) -> Tuple[str, bytes]:
+        """Digest and bytes of the source image, fetching it at most once."""
+        url_entry = self._url_entry(url)
+        digest = await run_in_threadpool(self._known_digest, url)
+        if digest:
+            data = await run_in_threadpool(self._read, self._path("sources", digest))
+            if data is not None:
+                return digest, data
+
+        async def fetch():
+            with span("image.fetch"):
+                async with httpx.AsyncClient(timeout=settings.IMAGE_FETCH_TIMEOUT_SECONDS, follow_redirects=True) as client:
+                    try:
+                        data = await _download(client, url)
+                    except httpx.HTTPError as e:
+                        raise ImageFetchError(f"Could not fetch {url}: {e}") from e
+            source_digest = _digest(data)
+            await run_in_threadpool(self._write, self._path("sources", source_digest), data)
+            await run_in_threadpool(self._write_url_entry, url_entry, source_digest)
+            return source_digest, data
+
+        return await self._inflight.do(f"source:{url}", fetch)
+
+    def _write_url_entry(self, path: str, digest: str) -> None:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(digest)
+        os.replace(tmp, path)
+
+    async def variant(self, url: str, size: str, fmt: str) -> Tuple[str, str]:
+        """Path and ETag of the `size`/`fmt` variant of the image at `url`, creating it if needed."""
+        # Serve a cached variant without loading (or refetching) its source
+        known_digest = await run_in_threadpool(self._known_digest, url)
+        if known_digest:
+            path = self._path("variants", f"{known_digest}-{size}.{fmt}")
+            if await run_in_threadpool(self._cached_variant, path):
+                CACHE_HITS.inc()
+                return path, f"{known_digest[:32]}-{size}-{fmt}"
+
+        source_digest, source = await self._source(url)
+        etag = f"{source_digest[:32]}-{size}-{fmt}"
+        path = self._path("variants", f"{source_digest}-{size}.{fmt}")
+        if await run_in_threadpool(self._cached_variant, path):
+            CACHE_HITS.inc()
+            return path, etag
+
+        async def render():
+            with span("image.render"):
+                data = await run_in_threadpool(_render, source, VARIANTS[size], fmt)
+            await run_in_threadpool(self._write, path, data)
+            CACHE_MISSES.inc()
+            return path, etag
+
+        return await self._inflight.do(f"variant:{path}", render)
+
+
+_cache: Optional[ImageCache] = None
+
+
+def get_cache() -> ImageCache:
+    global _cache
+    if _cache is None:
+        _cache = ImageCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
+    return _cache
+
+
+def image_version(url: str) -> str:
+    """Changes whenever a recipe's image at some index is replaced."""
+    return _digest(url.encode())[:16]
+
+
+def proxied_images(recipe_id, images: List[Optional[str]], size: str = "card") -> List[Optional[str]]:
+    """Point recipe image URLs at this proxy when IMAGE_PROXY_BASE_URL is configured."""
+    base = settings.IMAGE_PROXY_BASE_URL
+    if not base or not images:
+        return images
+    return [
+        f"{base.rstrip('/')}/images/{recipe_id}/{i}?size={size}&v={image_version(image)}" if image else None
+        for i, image in enumerate(images)
+    ]
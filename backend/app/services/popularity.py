@@ -0,0 +1,215 @@
+"""
+Popularity priors for cold-start recommendations.
+
+Swipe outcomes land in `swipe_events` (written by the session store's
+flusher). `aggregate` periodically folds the events after the stored
+watermark into running per-recipe and per-tag like/swipe totals, so each run
+only touches new events; one worker does it at a time, serialized by a row
+lock on `popularity_state`. Event ids and `created_at` are assigned when a
+flush inserts the events, before it commits, so a run only goes up to the
+newest event older than POPULARITY_SETTLE_SECONDS: a lower id still being
+written would otherwise be behind the watermark by the time it commits, and
+never counted.
+
+Workers turn the totals into priors: a smoothed like rate (shrunk towards the
+global rate until enough swipes accumulate) expressed as log-lift over the
+global rate, so a tag liked twice as often as average scores +0.69 and one
+liked half as often -0.69. `/next` adds these to a session's own weights,
+fading them out as the session gathers its own swipes.
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import registry
+from app.models import PopularityState, RecipePopularity, TagPopularity
+
+logger = logging.getLogger(__name__)
+
+# Pseudo-swipes at the global like rate added to every recipe and tag
+SMOOTHING = 20
+# Aggregated events older than this are deleted, at most this many per run
+EVENT_RETENTION_DAYS = 30
+EVENT_PURGE_BATCH = 10000
+
+EVENTS_AGGREGATED = registry.counter("swipe_events_aggregated_total", "Swipe events folded into popularity totals")
+
+_SETTLED_HIGH_SQL = text("""
+    SELECT coalesce(max(id), :low) FROM swipe_events
+    WHERE id > :low AND created_at < clock_timestamp() - make_interval(secs => :settle_seconds)
+""")
+
+_RECIPE_TOTALS_SQL = text("""
+    INSERT INTO recipe_popularity (recipe_id, likes, swipes)
+    SELECT e.recipe_id, count(*) FILTER (WHERE e.liked), count(*)
+    FROM swipe_events e JOIN recipes r ON r.id = e.recipe_id
+    WHERE e.id > :low AND e.id <= :high
+    GROUP BY e.recipe_id
+    ON CONFLICT (recipe_id) DO UPDATE SET
+        likes = recipe_popularity.likes + EXCLUDED.likes,
+        swipes = recipe_popularity.swipes + EXCLUDED.swipes
+""")
+
+_TAG_TOTALS_SQL = text("""
+    INSERT INTO tag_popularity (tag_id, likes, swipes)
+    SELECT t.tag_id, count(*) FILTER (WHERE e.liked), count(*)
+    FROM swipe_events e
+    JOIN recipes r ON r.id = e.recipe_id
+    CROSS JOIN LATERAL unnest(r.tag_ids) AS t(tag_id)
+    WHERE e.id > :low AND e.id <= :high
+    GROUP BY t.tag_id
+    ON CONFLICT (tag_id) DO UPDATE SET
+        likes = tag_popularity.likes + EXCLUDED.likes,
+        swipes = tag_popularity.swipes + EXCLUDED.swipes
+""")
+
+_PURGE_EVENTS_SQL = text("""
+    DELETE FROM swipe_events WHERE id IN (
+        SELECT id FROM swipe_events
+        WHERE id <= :high AND created_at < :cutoff
+        ORDER BY id
+        LIMIT :batch_size
+    )
+""")
+
+
+def aggregate(db: Session) -> int:
+    """Fold settled swipe events newer than the watermark into the totals; returns events folded."""
+    state = db.query(PopularityState).filter(PopularityState.id == 1).with_for_update().first()
+    if state is None:
+        state = PopularityState(id=1, last_event_id=0)
+        db.add(state)
+        db.flush()
+    low = state.last_event_id
+    high = db.execute(_SETTLED_HIGH_SQL, {"low": low, "settle_seconds": settings.POPULARITY_SETTLE_SECONDS}).scalar()
+    if high <= low:
+        db.rollback()
+        return 0
+
+    params = {"low": low, "high": high}
+    db.execute(_RECIPE_TOTALS_SQL, params)
+    db.execute(_TAG_TOTALS_SQL, params)
+    state.last_event_id = high
+    state.refreshed_at = datetime.now(timezone.utc)
+    db.execute(_PURGE_EVENTS_SQL, {
+        "high": high,
+        "cutoff": datetime.now(timezone.utc) - timedelta(days=EVENT_RETENTION_DAYS),
+        "batch_size": EVENT_PURGE_BATCH,
+    })
+    db.commit()
+    # Event ids are from a sequence, so this counts events plus any ids lost to rollbacks
+    EVENTS_AGGREGATED.inc(high - low)
+    return high - low
+
+
+def _log_lift(likes: np.ndarray, swipes: np.ndarray, global_rate: float) -> np.ndarray:
+    rate = (likes + SMOOTHING * global_rate) / (swipes + SMOOTHING)
+    return np.log(rate / global_rate)
+
+
+class PopularityPriors:
+    """Per-tag and per-recipe priors loaded from the popularity totals."""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.tag_weights = np.zeros(0, dtype=np.float64)
+        self.recipe_ids: List = []
+        self.recipe_weights = np.zeros(0, dtype=np.float64)
+        self._aligned: Tuple[object, Optional[np.ndarray]] = (None, None)
+        self._lock = threading.Lock()
+
+    def load(self, db: Session) -> bool:
+        """Reload the priors if the totals changed since the last load; True if reloaded."""
+        version = db.query(PopularityState.last_event_id).filter(PopularityState.id == 1).scalar()
+        if version == self.version:
+            return False
+
+        tag_rows = db.query(TagPopularity.tag_id, TagPopularity.likes, TagPopularity.swipes).all()
+        recipe_rows = db.query(RecipePopularity.recipe_id, RecipePopularity.likes, RecipePopularity.swipes).all()
+        likes = sum(row.likes for row in recipe_rows)
+        swipes = sum(row.swipes for row in recipe_rows)
+        # Clamp so a catalog everyone likes (or nobody does) still gives finite lifts
+        global_rate = min(max((likes + 1) / (swipes + 2), 0.01), 0.99)
+
+        tag_weights = np.zeros(max((row.tag_id for row in tag_rows), default=-1) + 1, dtype=np.float64)
+        if tag_rows:
+            tag_ids, tag_likes, tag_swipes = (np.array(column) for column in zip(*tag_rows))
+            tag_weights[tag_ids] = _log_lift(tag_likes, tag_swipes, global_rate)
+        recipe_weights = np.zeros(len(recipe_rows), dtype=np.float64)
+        if recipe_rows:
+            _, recipe_likes, recipe_swipes = zip(*recipe_rows)
+            recipe_weights = _log_lift(np.array(recipe_likes), np.array(recipe_swipes), global_rate)
+
+        with self._lock:
+            self.tag_weights = tag_weights
+            self.recipe_ids = [row.recipe_id for row in recipe_rows]
+            self.recipe_weights = recipe_weights
+            self.version = version
+            self._aligned = (None, None)
+        logger.info("Loaded popularity priors", extra={"tags": len(tag_rows), "recipes": len(recipe_rows)})
+        return True
+
+    def weight_table(self, session_table: Sequence[float], strength: float) -> Sequence[float]:
+        """A session's tag weight table with `strength` times the tag priors added."""
+        if strength <= 0 or not len(self.tag_weights):
+            return session_table
+        size = max(len(session_table), len(self.tag_weights))
+        table = np.zeros(size, dtype=np.float64)
+        table[:len(session_table)] = session_table
+        table[:len(self.tag_weights)] += strength * self.tag_weights
+        return table
+
+    def recipe_prior(self, index, strength: float) -> Optional[np.ndarray]:
+        """`strength` times the recipe priors, aligned to `index` ordinals; None if there are none."""
+        if strength <= 0 or not self.recipe_ids:
+            return None
+        with self._lock:
+            aligned_index, aligned = self._aligned
+            if aligned_index is not index:
+                # Realigned only when the catalog index or the priors change
+                aligned = np.zeros(index.size, dtype=np.float64)
+                ordinals = index.lookup(self.recipe_ids)
+                found = ordinals >= 0
+                aligned[ordinals[found]] = self.recipe_weights[found]
+                self._aligned = (index, aligned)
+        return strength * aligned
+
+
+def prior_strength(swipes: int) -> float:
+    """Weight of the popularity priors for a session with `swipes` swipes; fades to zero."""
+    fade = settings.POPULARITY_PRIOR_FADE_SWIPES
+    if fade <= 0:
+        return 0.0
+    return settings.POPULARITY_PRIOR_STRENGTH * max(0.0, 1.0 - swipes / fade)
+
+
+def refresh() -> None:
+    db = SessionLocal()
+    try:
+        folded = aggregate(db)
+        if folded:
+            logger.info("Aggregated swipe events", extra={"events": folded})
+        priors.load(db)
+    finally:
+        db.close()
+
+
+async def run_refresher(interval: float) -> None:
+    while True:
+        try:
+            await run_in_threadpool(refresh)
+        except Exception:
+            logger.exception("Popularity refresh failed")
+        await asyncio.sleep(interval)
+
+
+priors = PopularityPriors()
@@ -0,0 +1,76 @@
+import struct
+from typing import Dict, Iterable, List, Optional
+
+# Each swipe multiplies all earlier evidence by DECAY (half-life of ~14 swipes)
+DECAY = 0.95
+# Only the strongest MAX_TRACKED_TAGS weights are kept per session
+MAX_TRACKED_TAGS = 64
+# Fold the lazy decay scale back into the stored values before it grows too large
+_MAX_SCALE = 1e6
+
+_HEADER = struct.Struct("<dH")  # scale, tag count
+
+
+class TagPreferences:
+    """
+    Exponentially decayed, size-bounded tag weights for one swipe session.
+
+    Decay is applied lazily: stored values are kept multiplied by a growing
+    `scale` and new evidence is added pre-multiplied by it, so a swipe only
+    touches the tags on the swiped recipe. The effective weight of a tag is
+    `stored / scale`.
+    """
+
+    __slots__ = ("_values", "_scale")
+
+    def __init__(self, weights: Optional[Dict[int, float]] = None, scale: float = 1.0):
+        self._values: Dict[int, float] = dict(weights or {})
+        self._scale = scale
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def update(self, tag_ids: Iterable[int], delta: float) -> None:
+        """Decay all existing weights one step, then add `delta` to each of `tag_ids`."""
+        self._scale /= DECAY
+        if self._scale > _MAX_SCALE:
+            self._values = {tag_id: value / self._scale for tag_id, value in self._values.items()}
+            self._scale = 1.0
+
+        increment = delta * self._scale
+        for tag_id in tag_ids:
+            self._values[tag_id] = self._values.get(tag_id, 0.0) + increment
+
+        overflow = len(self._values) - MAX_TRACKED_TAGS
+        if overflow > 0:
+            weakest = sorted(self._values, key=lambda tag_id: abs(self._values[tag_id]))[:overflow]
+            for tag_id in weakest:
+                del self._values[tag_id]
+
+    def weights(self) -> Dict[int, float]:
+        return {tag_id: value / self._scale for tag_id, value in self._values.items()}
+
+    def dense(self, default: float = 0.0) -> List[float]:
+        """Weights as a list indexed by tag id, for integer-indexed scoring."""
+        if not self._values:
+            return []
+        table = [default] * (max(self._values) + 1)
+        for tag_id, value in self._values.items():
+            table[tag_id] = value / self._scale
+        return table
+
+    def dumps(self) -> bytes:
+        """Pack as `scale, count, ids[count] (int32), values[count] (float32)`."""
+        tag_ids = sorted(self._values)
+        count = len(tag_ids)
+        return _HEADER.pack(self._scale, count) + struct.pack(
+            f"<{count}i{count}f", *tag_ids, *(self._values[tag_id] for tag_id in tag_ids)
+        )
+
+    @classmethod
+    def loads(cls, data: Optional[bytes]) -> "TagPreferences":
+        if not data:
+            return cls()
+        scale, count = _HEADER.unpack_from(data)
+        unpacked = struct.unpack_from(f"<{count}i{count}f", data, _HEADER.size)
+        return cls(dict(zip(unpacked[:count], unpacked[count:])), scale)
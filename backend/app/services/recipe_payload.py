@@ -0,0 +1,26 @@
+from sqlalchemy.orm import Session
+
+from app.models import Recipe
+from app.services.image_service import proxied_images
+from app.services.tag_vocabulary import vocabulary
+
+
+def recipe_to_dict(db: Session, recipe: Recipe, is_saved: bool) -> dict:
+    """The `Recipe` schema's fields for a database row, ready to serialize."""
+    return {**recipe_content(db, recipe), "is_saved": is_saved}
+
+
+def recipe_content(db: Session, recipe: Recipe) -> dict:
+    """The recipe's own fields, without per-user state such as `is_saved`."""
+    return {
+        "id": recipe.id,
+        "title": recipe.title,
+        "ingredients": recipe.ingredients,
+        "steps": recipe.steps,
+        "source_url": recipe.source_url,
+        "images": proxied_images(recipe.id, recipe.images),
+        "total_time": recipe.total_time,
+        "servings": recipe.servings,
+        "tags": vocabulary.names_for(db, recipe.tag_ids),
+        "hash": recipe.hash,
+    }
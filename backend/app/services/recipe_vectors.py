@@ -0,0 +1,116 @@
+"""
+Locally computed recipe vectors for "more like this".
+
+Each recipe is described by a set of features (title words, ingredient words
+and tag ids), weighted by TF-IDF and reduced to DIMENSIONS floats with a
+Gaussian random projection, which approximately preserves cosine similarity.
+Vectors are L2-normalized, so similarity is a dot product.
+
+Catalogs up to EXACT_SEARCH_MAX recipes are searched exhaustively with one
+matrix-vector product. Larger ones also get an inverted-file index: k-means
+centroids partition the vectors, and a query only scores the recipes in the
+IVF_PROBES lists whose centroids are closest to it.
+"""
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+DIMENSIONS = 128
+EXACT_SEARCH_MAX = 20000
+IVF_PROBES = 24
+IVF_TRAINING_SAMPLE = 20000
+IVF_ITERATIONS = 8
+_CHUNK = 4096
+_SEED = 0
+
+
+class FeatureBuilder:
+    """Collects each recipe's feature ids while the catalog is being scanned."""
+
+    def __init__(self):
+        self.feature_ids: Dict[str, int] = {}
+        self.indptr: List[int] = [0]
+        self.indices: List[int] = []
+
+    def add(self, features: Sequence[str]) -> None:
+        for feature in set(features):
+            self.indices.append(self.feature_ids.setdefault(feature, len(self.feature_ids)))
+        self.indptr.append(len(self.indices))
+
+    def vectors(self) -> np.ndarray:
+        """TF-IDF weighted, randomly projected, L2-normalized vectors (float32, one row per recipe)."""
+        size = len(self.indptr) - 1
+        vectors = np.zeros((size, DIMENSIONS), dtype=np.float32)
+        if not self.indices:
+            return vectors
+        indptr = np.asarray(self.indptr, dtype=np.int64)
+        indices = np.asarray(self.indices, dtype=np.int64)
+
+        # Features are binary per recipe, so a feature's weight is just its idf
+        document_frequency = np.bincount(indices, minlength=len(self.feature_ids))
+        idf = (np.log((1 + size) / (1 + document_frequency)) + 1).astype(np.float32)
+        projection = np.random.default_rng(_SEED).standard_normal(
+            (len(self.feature_ids), DIMENSIONS), dtype=np.float32
+        ) * idf[:, None]
+
+        # Sum projected features per recipe, a chunk of recipes at a time to bound memory
+        for start in range(0, size, _CHUNK):
+            stop = min(start + _CHUNK, size)
+            lo, hi = indptr[start], indptr[stop]
+            # A trailing zero row keeps every offset valid for reduceat, even for
+            # recipes without features at the end of the chunk
+            gathered = np.vstack([projection[indices[lo:hi]], np.zeros((1, DIMENSIONS), dtype=np.float32)])
+            summed = np.add.reduceat(gathered, indptr[start:stop] - lo, axis=0)
+            # reduceat yields a single element for empty segments; those recipes stay zero
+            summed[np.diff(indptr[start:stop + 1]) == 0] = 0.0
+            vectors[start:stop] = summed
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def _kmeans(vectors: np.ndarray, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means on a sample of `vectors`; returns normalized centroids."""
+    sample_size = min(len(vectors), IVF_TRAINING_SAMPLE)
+    sample = vectors[rng.choice(len(vectors), size=sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, size=clusters, replace=False)].copy()
+    for _ in range(IVF_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for cluster in range(clusters):
+            members = sample[assignment == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        np.divide(centroids, norms, out=centroids, where=norms > 0)
+    return centroids
+
+
+def build_ivf(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(centroids, indptr, ordinals) of an inverted-file index, or empty arrays for small catalogs."""
+    if len(vectors) <= EXACT_SEARCH_MAX:
+        return (
+            np.empty((0, DIMENSIONS), dtype=np.float32),
+            np.zeros(1, dtype=np.int64),
+            np.empty(0, dtype=np.int32),
+        )
+    clusters = int(math.sqrt(len(vectors)))
+    centroids = _kmeans(vectors, clusters, np.random.default_rng(_SEED))
+    assignment = np.concatenate([
+        np.argmax(vectors[start:start + _CHUNK] @ centroids.T, axis=1)
+        for start in range(0, len(vectors), _CHUNK)
+    ])
+    order = np.argsort(assignment, kind="stable").astype(np.int32)
+    indptr = np.zeros(clusters + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignment, minlength=clusters), out=indptr[1:])
+    return centroids, indptr, order
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the `k` largest scores, best first."""
+    if len(scores) > k:
+        candidates = np.argpartition(-scores, k)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -1,41 +1,117 @@
+"""
+Runs the AllRecipes crawl and streams its progress.
+
+The crawl runs in the crochet reactor thread; the pipeline stores each item
+in its own database session and reports the outcome with the `recipe_stored`
+signal. Those signals are turned into small NDJSON events and handed to the
+request thread through a bounded queue, so memory use is the same for ten
+recipes or ten thousand: the service keeps only per-outcome counters, and if
+the client reads slower than recipes arrive, per-recipe events are dropped
+(the counters, and the final `done` event, are always complete).
+"""
+import json
+import logging
+import os
+import queue
+import time
+from collections import Counter
+from typing import Iterator
+
+from crochet import run_in_reactor, setup
+from scrapy import signals
 from scrapy.crawler import CrawlerRunner
+from scrapy.utils.log import configure_logging
 from scrapy.utils.project import get_project_settings
+
+from app.scraper.pipelines.database import recipe_stored
 from app.scraper.spiders.allrecipes_crawler import AllrecipesCrawlerSpider
-from twisted.internet import reactor
-from scrapy.utils.log import configure_logging
-from typing import List, Dict, Any
-import os
-from scrapy import signals
-from twisted.internet.defer import Deferred
-from crochet import setup, wait_for
-from scrapy.signalmanager import dispatcher
 
-# Initialize crochet
-setup()
+logger = logging.getLogger(__name__)
+
+CRAWL_TIMEOUT_SECONDS = 1800
+# Events waiting for a slow client; beyond this, per-recipe events are dropped
+MAX_PENDING_EVENTS = 1000
+# Seconds between heartbeat events while nothing else happens, so proxies keep the stream open
+HEARTBEAT_SECONDS = 15
+
+_DONE = object()
+
 
 class ScraperService:
     def __init__(self, max_recipes):
+        # Start the crochet reactor thread on first use (no-op afterwards)
+        setup()
         configure_logging()
         os.environ['SCRAPY_SETTINGS_MODULE'] = 'app.scraper.settings.settings'
         self.runner = CrawlerRunner(get_project_settings())
         self.max_recipes = max_recipes
-        self.items = []
-
-    def _item_scraped(self, item, response, spider):
-        """Callback function that's called when an item is scraped"""
-        self.items.append(item)
-
-    @wait_for(timeout=1800)  # 30 minutes timeout (increased from 5 minutes)
-    def bulk_scrape_from_topics(self, db_session) -> List[Dict[str, Any]]:
-        """Scrape the first recipe from each topic in the A-Z listing"""
-        # Clear any previous items
-        self.items = []
-        
-        # Connect the item scraped signal
-        dispatcher.connect(self._item_scraped, signal=signals.item_scraped)
-        
-        # Start the crawl with the database session
-        d = self.runner.crawl(AllrecipesCrawlerSpider, db_session=db_session, max_recipes=self.max_recipes)
-        
-        # Return the items after the crawl is done
-        return d.addCallback(lambda _: self.items)
\ No newline at end of file
+        self.counts = Counter()
+        self._events: "queue.Queue" = queue.Queue(maxsize=MAX_PENDING_EVENTS)
+        self._crawler = None
+
+    def _emit(self, event: dict) -> None:
+        try:
+            self._events.put_nowait(event)
+        except queue.Full:
+            self.counts["events_dropped"] += 1
+
+    def _recipe_stored(self, item, outcome):
+        self.counts[outcome] += 1
+        self._emit({"event": "recipe", "status": outcome, "url": item.get('source_url'), "title": item.get('title')})
+
+    def _item_error(self, item, response, spider, failure):
+        self.counts["failed"] += 1
+        self._emit({"event": "error", "url": item.get('source_url'), "error": str(failure.value)})
+
+    def _finished(self, result):
+        # Never block the reactor: make room by dropping the oldest event if the client is behind
+        while True:
+            try:
+                self._events.put_nowait(_DONE)
+                return result
+            except queue.Full:
+                self._events.get_nowait()
+                self.counts["events_dropped"] += 1
+
+    @run_in_reactor
+    def _start(self):
+        self._crawler = self.runner.create_crawler(AllrecipesCrawlerSpider)
+        self._crawler.signals.connect(self._recipe_stored, signal=recipe_stored)
+        self._crawler.signals.connect(self._item_error, signal=signals.item_error)
+        d = self.runner.crawl(self._crawler, max_recipes=self.max_recipes)
+        d.addErrback(lambda failure: self._emit({"event": "error", "error": str(failure.value)}))
+        d.addBoth(self._finished)
+
+    @run_in_reactor
+    def _stop(self):
+        if self._crawler is not None and self._crawler.crawling:
+            return self._crawler.stop()
+
+    def stream_scrape_from_topics(self) -> Iterator[str]:
+        """Start scraping the first recipe from each topic in the A-Z listing; returns NDJSON progress events"""
+        # Returns once the crawl is scheduled, raising if it could not be started
+        self._start().wait(timeout=30)
+        return self._stream(time.monotonic())
+
+    def _stream(self, started: float) -> Iterator[str]:
+        finished = False
+        try:
+            while not finished:
+                if time.monotonic() - started > CRAWL_TIMEOUT_SECONDS:
+                    logger.warning("Bulk scrape timed out", extra=dict(self.counts))
+                    yield json.dumps({"event": "error", "error": "Crawl timed out"}) + "\n"
+                    break
+                try:
+                    event = self._events.get(timeout=HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    event = {"event": "heartbeat"}
+                if event is _DONE:
+                    finished = True
+                    continue
+                yield json.dumps(event) + "\n"
+            yield json.dumps({"event": "done", "counts": dict(self.counts)}) + "\n"
+            logger.info("Bulk scrape finished", extra=dict(self.counts))
+        finally:
+            if not finished:
+                # The client went away (or the crawl timed out); don't keep crawling for nobody
+                self._stop()
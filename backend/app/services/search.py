@@ -0,0 +1,119 @@
+"""
+Recipe search backed by Postgres full-text and trigram indexes.
+
+`recipes.search_vector` weights the title (A) above ingredient names and tags
+(B) and steps (C); it and `recipes.ingredient_names` are written by the scraper
+pipeline, and `backfill_search_columns` fills them for rows inserted any other
+way. Queries are answered from the GIN indexes added in the add_recipe_search
+migration.
+
+Pantry search is answered from the in-memory catalog index instead (see
+`CatalogIndex.pantry`), which matches by words like its ingredient filters: an
+ingredient is covered by something on hand when it contains all of its words,
+so "flour" covers "all-purpose flour".
+"""
+import re
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, literal_column, text
+from sqlalchemy.orm import Session
+
+from app.models import Recipe
+
+SEARCH_CONFIG = literal_column("'english'")
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"[a-z]+")
+
+
+def normalize_ingredient(name: str) -> str:
+    return _WHITESPACE.sub(" ", name.strip().lower())
+
+
+def ingredient_tokens(name: str) -> List[str]:
+    """Words of an ingredient name, so "chicken" matches "chicken breast"."""
+    return [token for token in _TOKEN.findall(name.lower()) if len(token) > 1]
+
+
+def search_vector(title: str, ingredient_names: Sequence[str], tag_names: Sequence[str], steps: Sequence[str]):
+    """SQL expression computing a recipe's weighted search vector on insert/update."""
+    return (
+        func.setweight(func.to_tsvector(SEARCH_CONFIG, title), "A")
+        .op("||")(func.setweight(func.to_tsvector(SEARCH_CONFIG, " ".join([*ingredient_names, *tag_names])), "B"))
+        .op("||")(func.setweight(func.to_tsvector(SEARCH_CONFIG, " ".join(steps)), "C"))
+    )
+
+
+_BACKFILL_SQL = text("""
+    UPDATE recipes r SET
+        ingredient_names = COALESCE(
+            (SELECT array_agg(DISTINCT lower(regexp_replace(btrim(k), '\\s+', ' ', 'g'))) FROM json_object_keys(r.ingredients) k),
+            '{}'
+        ),
+        search_vector =
+            setweight(to_tsvector('english', r.title), 'A') ||
+            setweight(to_tsvector('english',
+                COALESCE((SELECT string_agg(k, ' ') FROM json_object_keys(r.ingredients) k), '') || ' ' ||
+                COALESCE((SELECT string_agg(t.name, ' ') FROM tags t WHERE t.id = ANY(r.tag_ids)), '')
+            ), 'B') ||
+            setweight(to_tsvector('english', array_to_string(r.steps, ' ')), 'C')
+    WHERE r.id IN (SELECT id FROM recipes WHERE search_vector IS NULL LIMIT :batch_size)
+""")
+
+
+def backfill_search_columns(db: Session, batch_size: int = 5000) -> int:
+    """Fill search columns for recipes that have none, in batches; returns rows updated."""
+    total = 0
+    while True:
+        updated = db.execute(_BACKFILL_SQL, {"batch_size": batch_size}).rowcount
+        db.commit()
+        total += updated
+        if updated < batch_size:
+            return total
+
+
+_TEXT_SEARCH_SQL = text("""
+    SELECT r.id, r.title, r.images, r.total_time, r.servings, r.tag_ids,
+           ts_rank_cd(r.search_vector, q.query) + similarity(r.title, :q) AS rank
+    FROM recipes r, websearch_to_tsquery('english', :q) AS q(query)
+    WHERE r.search_vector @@ q.query OR r.title % :q
+    ORDER BY rank DESC, r.id
+    LIMIT :limit OFFSET :offset
+""")
+
+def search_recipes(db: Session, query: str, limit: int, offset: int) -> List[Tuple]:
+    """Ranked full-text search over title, ingredients, tags and steps, with fuzzy title matching."""
+    return db.execute(_TEXT_SEARCH_SQL, {"q": query, "limit": limit, "offset": offset}).all()
+
+
+class PantryMatch(NamedTuple):
+    id: UUID
+    title: str
+    images: Optional[List[str]]
+    total_time: Optional[int]
+    servings: Optional[int]
+    tag_ids: Optional[List[int]]
+    rank: float
+
+
+def recipes_from_ingredients(
+    db: Session, index, have: Sequence[str], max_missing: int, limit: int, offset: int
+) -> List[PantryMatch]:
+    """
+    Recipes whose ingredients are covered by `have`, allowing up to `max_missing`
+    others, from the catalog `index`; recipes newer than the index are not found.
+    """
+    ordinals, ranks = index.pantry(have, max_missing)
+    ordinals, ranks = ordinals[offset:offset + limit], ranks[offset:offset + limit]
+    if not len(ordinals):
+        return []
+    rank_of = {index.recipe_id(int(ordinal)): float(rank) for ordinal, rank in zip(ordinals, ranks)}
+    rows = (
+        db.query(Recipe.id, Recipe.title, Recipe.images, Recipe.total_time, Recipe.servings, Recipe.tag_ids)
+        .filter(Recipe.id.in_(rank_of))
+        .all()
+    )
+    # Recipes deleted since the index was built are skipped
+    by_id = {row.id: row for row in rows}
+    return [PantryMatch(*by_id[recipe_id], rank=rank) for recipe_id, rank in rank_of.items() if recipe_id in by_id]
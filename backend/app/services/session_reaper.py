@@ -0,0 +1,98 @@
+"""
+Background expiry of abandoned swipe and cooking sessions.
+
+Clients only delete sessions they end explicitly, so sessions whose
+`last_updated` is older than their TTL are purged here in bounded batches:
+each batch is its own short transaction, locking at most `batch_size` rows
+and skipping rows a live request holds, so reaping never blocks requests.
+
+Every worker schedules the reaper, but a Postgres advisory lock lets only one
+of them reap at a time. That worker drops reaped swipe sessions from its
+session store; another worker may still cache one it served before. If that
+session is swiped again, its next flush re-inserts the row (flushes upsert),
+so the user keeps their session and nothing fails.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import List
+from uuid import UUID
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.metrics import registry
+from app.services.session_store import store as session_store
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_REAPED = registry.counter("sessions_reaped_total", "Expired sessions deleted by the reaper, by kind")
+
+# Table names come from this fixed map, never from input
+_TABLES = {
+    "swipe": "swipe_sessions",
+    "cooking": "cooking_sessions",
+}
+
+# Held by the worker currently reaping (an arbitrary key, unique in this app)
+_REAPER_LOCK_KEY = 0x5E55_0EA9
+
+_DELETE_BATCH_SQL = """
+    DELETE FROM {table} WHERE id IN (
+        SELECT id FROM {table}
+        WHERE last_updated < :cutoff
+        ORDER BY last_updated
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id
+"""
+
+
+def reap_expired(db: Session, kind: str, ttl_seconds: float, batch_size: int) -> int:
+    """Delete sessions of `kind` idle for longer than `ttl_seconds`; returns rows deleted."""
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=ttl_seconds)
+    statement = text(_DELETE_BATCH_SQL.format(table=_TABLES[kind]))
+    total = 0
+    while True:
+        ids: List[UUID] = db.execute(statement, {"cutoff": cutoff, "batch_size": batch_size}).scalars().all()
+        db.commit()
+        if kind == "swipe" and ids:
+            session_store.forget(ids)
+        total += len(ids)
+        SESSIONS_REAPED.inc(len(ids), kind=kind)
+        if len(ids) < batch_size:
+            return total
+
+
+def reap_all() -> None:
+    """One reaping round, skipped if another worker is already reaping."""
+    # The lock lives on its own connection; the batches commit on another
+    with engine.connect() as lock:
+        if not lock.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _REAPER_LOCK_KEY}).scalar():
+            return
+        # End the lock query's transaction; the (session-level) lock is kept
+        lock.commit()
+        try:
+            db = SessionLocal()
+            try:
+                swipe = reap_expired(db, "swipe", settings.SWIPE_SESSION_TTL_SECONDS, settings.SESSION_REAPER_BATCH_SIZE)
+                cooking = reap_expired(db, "cooking", settings.COOKING_SESSION_TTL_SECONDS, settings.SESSION_REAPER_BATCH_SIZE)
+            finally:
+                db.close()
+        finally:
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _REAPER_LOCK_KEY})
+    if swipe or cooking:
+        logger.info("Reaped expired sessions", extra={"swipe_sessions": swipe, "cooking_sessions": cooking})
+
+
+async def run_reaper(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(reap_all)
+        except Exception:
+            logger.exception("Session reaper failed")
@@ -0,0 +1,274 @@
+"""
+Write-behind store for active swipe sessions.
+
+Session state lives in memory while a user is swiping: `/start`, `/swipe`
+and `/next` read and mutate it without touching Postgres, and dirty sessions
+are written back in batches by `run_flusher` (every
+SESSION_FLUSH_INTERVAL_SECONDS, immediately once SESSION_MAX_DIRTY sessions are
+pending, and on shutdown). A crash loses at most that window of swipes.
+Each swipe's outcome is also buffered and appended to `swipe_events` in the
+same transaction, for the popularity aggregator.
+
+The store is per process, so with several workers a session should stay
+pinned to one worker (sticky routing); otherwise workers may each hold a
+diverging copy.
+"""
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Protocol
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal, note_write
+from app.models import SwipeEvent, SwipeSession
+from app.services.preferences import TagPreferences
+
+logger = logging.getLogger(__name__)
+
+# Sessions per upsert statement
+FLUSH_CHUNK_SIZE = 500
+
+
+class SwipeSessionState:
+    __slots__ = ("id", "preferences", "seen", "seen_set", "last_liked", "persisted", "dirty", "deleted", "version")
+
+    def __init__(self, session_id: uuid.UUID, preferences: TagPreferences, seen: List[uuid.UUID], persisted: bool):
+        self.id = session_id
+        self.preferences = preferences
+        self.seen = seen
+        self.seen_set = set(seen)
+        self.last_liked: Optional[uuid.UUID] = None  # in memory only; steers /next towards similar recipes
+        self.persisted = persisted  # False until the first flush inserts the row
+        self.dirty = False
+        self.deleted = False
+        self.version = 0  # bumped on every mutation, so a flush knows what it wrote
+
+    @classmethod
+    def from_row(cls, row: SwipeSession) -> "SwipeSessionState":
+        return cls(row.id, TagPreferences.loads(row.preferences), list(row.seen_recipes or []), persisted=True)
+
+
+class SessionBackend(Protocol):
+    """Where hot session state is kept; `LocalBackend` is the in-process default."""
+
+    def get(self, session_id: uuid.UUID) -> Optional[SwipeSessionState]: ...
+    def put(self, state: SwipeSessionState) -> None: ...
+    def pop(self, session_id: uuid.UUID) -> Optional[SwipeSessionState]: ...
+    def values(self) -> Iterator[SwipeSessionState]: ...
+    def __len__(self) -> int: ...
+
+
+class LocalBackend:
+    """LRU dict of sessions; only clean sessions are evicted when over capacity."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._sessions: "OrderedDict[uuid.UUID, SwipeSessionState]" = OrderedDict()
+
+    def get(self, session_id):
+        state = self._sessions.get(session_id)
+        if state is not None:
+            self._sessions.move_to_end(session_id)
+        return state
+
+    def put(self, state):
+        self._sessions[state.id] = state
+        self._sessions.move_to_end(state.id)
+        if len(self._sessions) > self.capacity:
+            self._evict()
+
+    def pop(self, session_id):
+        return self._sessions.pop(session_id, None)
+
+    def values(self):
+        return iter(list(self._sessions.values()))
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _evict(self):
+        excess = len(self._sessions) - self.capacity
+        for session_id in [sid for sid, state in self._sessions.items() if not state.dirty][:excess]:
+            del self._sessions[session_id]
+
+
+class SwipeSessionStore:
+    def __init__(self, backend: SessionBackend, max_dirty: int):
+        self.backend = backend
+        self.max_dirty = max_dirty
+        self._lock = threading.RLock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._dirty_count = 0
+        self._events: List[dict] = []  # swipe outcomes written with the next flush
+
+    def create(self) -> SwipeSessionState:
+        state = SwipeSessionState(uuid.uuid4(), TagPreferences(), [], persisted=False)
+        with self._lock:
+            self.backend.put(state)
+            self._mark_dirty(state)
+        return state
+
+    def get(self, db: Session, session_id: uuid.UUID) -> Optional[SwipeSessionState]:
+        """Return the session from memory, loading it from the database on a miss."""
+        with self._lock:
+            state = self.backend.get(session_id)
+        if state is not None:
+            return state
+
+        row = db.query(SwipeSession).filter(SwipeSession.id == session_id).first()
+        if row is None:
+            return None
+        with self._lock:
+            # Another request may have loaded it while we were querying
+            state = self.backend.get(session_id)
+            if state is None:
+                state = SwipeSessionState.from_row(row)
+                self.backend.put(state)
+        return state
+
+    def record_swipe(self, state: SwipeSessionState, recipe_id: uuid.UUID, tag_ids: List[int], delta: float) -> None:
+        with self._lock:
+            if recipe_id not in state.seen_set:
+                state.seen.append(recipe_id)
+                state.seen_set.add(recipe_id)
+            if delta > 0:
+                state.last_liked = recipe_id
+            self._events.append({
+                "session_id": state.id,
+                "recipe_id": recipe_id,
+                "liked": delta > 0,
+                # created_at is left to the database, so it is the time of the
+                # (possibly retried) flush that writes the event
+            })
+            state.preferences.update(tag_ids, delta)
+            self._mark_dirty(state)
+
+    def delete(self, db: Session, session_id: uuid.UUID) -> bool:
+        """Forget a session in memory and in the database; False if it never existed."""
+        with self._lock:
+            state = self.backend.pop(session_id)
+            if state is not None:
+                state.deleted = True
+                if state.dirty:
+                    state.dirty = False
+                    self._dirty_count -= 1
+        deleted = db.query(SwipeSession).filter(SwipeSession.id == session_id).delete(synchronize_session=False)
+        db.commit()
+        note_write("swipe_session", session_id)
+        return state is not None or deleted > 0
+
+    def forget(self, session_ids: List[uuid.UUID]) -> None:
+        """Drop sessions whose rows were deleted elsewhere (e.g. expired by the reaper)."""
+        with self._lock:
+            for session_id in session_ids:
+                state = self.backend.get(session_id)
+                if state is None:
+                    continue
+                if state.dirty:
+                    # Swiped since it was last written: it is active again, so re-insert
+                    # it; the version bump keeps an in-flight flush from marking it clean
+                    state.persisted = False
+                    state.version += 1
+                else:
+                    self.backend.pop(session_id)
+
+    def _mark_dirty(self, state: SwipeSessionState) -> None:
+        state.version += 1
+        if not state.dirty:
+            state.dirty = True
+            self._dirty_count += 1
+        if self._dirty_count >= self.max_dirty and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._flush_requested.set)
+
+    def flush(self) -> int:
+        """Write all dirty sessions in one transaction; returns the number written."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            pending = [
+                (state, state.version, state.persisted, {
+                    "id": state.id,
+                    "preferences": state.preferences.dumps(),
+                    "seen_recipes": list(state.seen),
+                    "last_updated": now,
+                })
+                for state in self.backend.values() if state.dirty
+            ]
+            events, self._events = self._events, []
+        if not pending and not events:
+            return 0
+
+        db = SessionLocal()
+        try:
+            inserts = sum(1 for _, _, persisted, _ in pending if not persisted)
+            # Upsert, so a row deleted behind our back (e.g. reaped by another
+            # worker) is re-inserted instead of failing the whole batch
+            for start in range(0, len(pending), FLUSH_CHUNK_SIZE):
+                statement = insert(SwipeSession).values([row for _, _, _, row in pending[start:start + FLUSH_CHUNK_SIZE]])
+                db.execute(statement.on_conflict_do_update(
+                    index_elements=[SwipeSession.id],
+                    set_={
+                        "preferences": statement.excluded.preferences,
+                        "seen_recipes": statement.excluded.seen_recipes,
+                        "last_updated": statement.excluded.last_updated,
+                    },
+                ))
+            if events:
+                db.bulk_insert_mappings(SwipeEvent, events)
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                self._events[:0] = events
+            logger.exception("Failed to flush swipe sessions", extra={"pending": len(pending), "events": len(events)})
+            return 0
+        finally:
+            db.close()
+
+        with self._lock:
+            for state, version, _, _ in pending:
+                # Evicted sessions are reloaded with this worker's `/next` reads
+                note_write("swipe_session", state.id)
+                # Mutations that raced with the write (or a concurrent forget())
+                # leave the session dirty for the next flush
+                if state.version == version:
+                    state.persisted = True
+                    if state.dirty:
+                        state.dirty = False
+                        self._dirty_count -= 1
+            resurrected = [state.id for state, _, _, _ in pending if state.deleted]
+        if resurrected:
+            # Sessions ended while this batch was being written
+            db = SessionLocal()
+            try:
+                db.query(SwipeSession).filter(SwipeSession.id.in_(resurrected)).delete(synchronize_session=False)
+                db.commit()
+            finally:
+                db.close()
+        logger.debug(
+            "Flushed swipe sessions",
+            extra={"inserted": inserts, "updated": len(pending) - inserts, "events": len(events)}
+        )
+        return len(pending)
+
+    async def run_flusher(self, interval: float) -> None:
+        """Flush on a fixed interval, or early when too many sessions are dirty."""
+        self._loop = asyncio.get_running_loop()
+        self._flush_requested = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await run_in_threadpool(self.flush)
+
+
+store = SwipeSessionStore(LocalBackend(settings.SESSION_CACHE_SIZE), settings.SESSION_MAX_DIRTY)
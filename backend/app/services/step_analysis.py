@@ -0,0 +1,96 @@
+"""
+Shared, coalesced and prefetched step analyses for cooking sessions.
+
+A step's actions depend only on its text, so results are cached per step text
+(an LRU of STEP_ANALYSIS_CACHE_SIZE entries) and concurrent requests for the
+same step share one in-flight completion. When step N is requested, steps
+N+1..N+STEP_PREFETCH_DEPTH are analyzed in the background, so advancing to
+the next step is usually a cache hit; a step is never analyzed twice while
+its result is cached, so prefetching only moves spend earlier.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from app.core.concurrency import SingleFlight
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.concurrency import AdmissionRejected
+from app.services.ai_service import AIService, Priority, admission
+
+logger = logging.getLogger(__name__)
+
+STEP_ANALYSES = registry.counter("step_analyses_total", "Step analysis lookups by outcome (hit, coalesced, miss, prefetch)")
+
+
+class StepAnalyzer:
+    def __init__(self, cache_size: int, prefetch_depth: int):
+        self.cache_size = cache_size
+        self.prefetch_depth = prefetch_depth
+        self._cache: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+        self._ai: Optional[AIService] = None
+
+    @property
+    def ai(self) -> AIService:
+        if self._ai is None:
+            self._ai = AIService()
+        return self._ai
+
+    def _key(self, step: str) -> str:
+        return hashlib.sha256(f"{self.ai.model}\0{step}".encode()).hexdigest()
+
+    def _cached(self, key: str) -> Optional[list]:
+        with self._lock:
+            actions = self._cache.get(key)
+            if actions is not None:
+                self._cache.move_to_end(key)
+            return actions
+
+    async def _run(self, key: str, step: str, priority: Priority = Priority.STEP) -> list:
+        actions = await self.ai.analyze_step_text(step, priority)
+        with self._lock:
+            self._cache[key] = actions
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return actions
+
+    async def actions(self, steps: Sequence[str], step_number: int) -> List[dict]:
+        """Actions for `steps[step_number]`, prefetching the steps after it."""
+        self.prefetch(steps, step_number + 1)
+        step = steps[step_number]
+        key = self._key(step)
+        actions = self._cached(key)
+        if actions is not None:
+            STEP_ANALYSES.inc(result="hit")
+            return actions
+        STEP_ANALYSES.inc(result="coalesced" if key in self._inflight else "miss")
+        return await self._inflight.do(key, lambda: self._run(key, step))
+
+    def prefetch(self, steps: Sequence[str], start: int) -> None:
+        """Start background analyses of the next steps that are neither cached nor in flight."""
+        for step in steps[start:start + self.prefetch_depth]:
+            key = self._key(step)
+            if key in self._inflight or self._cached(key) is not None:
+                continue
+            if not admission.has_capacity():
+                return  # never compete with interactive work for the model
+            STEP_ANALYSES.inc(result="prefetch")
+            task = self._inflight.start(key, lambda key=key, step=step: self._run(key, step, Priority.BACKGROUND))
+            task.add_done_callback(_log_prefetch_failure)
+
+
+def _log_prefetch_failure(task) -> None:
+    if task.cancelled() or task.exception() is None:
+        return
+    if isinstance(task.exception(), AdmissionRejected):
+        # Shed because the model is busy; the step is analyzed when requested
+        logger.debug("Step prefetch shed")
+    else:
+        logger.warning("Step prefetch failed", extra={"error": str(task.exception())})
+
+
+analyzer = StepAnalyzer(settings.STEP_ANALYSIS_CACHE_SIZE, settings.STEP_PREFETCH_DEPTH)
@@ -0,0 +1,91 @@
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Tag
+
+# Spellings AllRecipes uses interchangeably, mapped to one canonical tag
+TAG_SYNONYMS = {
+    "bbq": "barbecue",
+    "barbeque": "barbecue",
+    "desserts": "dessert",
+    "appetizers": "appetizer",
+    "side dishes": "side dish",
+    "main dishes": "main dish",
+    "soups": "soup",
+    "salads": "salad",
+    "cookies": "cookie",
+    "veggie": "vegetarian",
+    "gluten free": "gluten-free",
+    "dairy free": "dairy-free",
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_tag(tag: str) -> str:
+    """Lowercase, collapse whitespace, strip stray punctuation and apply synonyms."""
+    name = _WHITESPACE.sub(" ", tag.strip().lower()).strip(" .,;:")
+    return TAG_SYNONYMS.get(name, name)
+
+
+def normalize_tags(tags: Iterable[str]) -> List[str]:
+    """Normalize and de-duplicate tags, preserving their first-seen order."""
+    seen = {}
+    for tag in tags:
+        name = normalize_tag(tag)
+        if name:
+            seen.setdefault(name, None)
+    return list(seen)
+
+
+class TagVocabulary:
+    """Process-wide cache of the tags table, mapping names to ids and back."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session) -> None:
+        rows = db.query(Tag.id, Tag.name).all()
+        with self._lock:
+            self._ids = {name: tag_id for tag_id, name in rows}
+            self._names = {tag_id: name for tag_id, name in rows}
+
+    def ids_for(self, db: Session, names: Iterable[str]) -> List[int]:
+        """
+        Return sorted tag ids for `names`, inserting tags we have not seen yet.
+        New tags are committed immediately so cached ids always exist in the table.
+        """
+        names = normalize_tags(names)
+        missing = [name for name in names if name not in self._ids]
+        if missing:
+            db.execute(
+                insert(Tag)
+                .values([{"name": name} for name in missing])
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            db.commit()
+            rows = db.query(Tag.id, Tag.name).filter(Tag.name.in_(missing)).all()
+            with self._lock:
+                for tag_id, name in rows:
+                    self._ids[name] = tag_id
+                    self._names[tag_id] = name
+        return sorted(self._ids[name] for name in names)
+
+    def id_for(self, name: str) -> Optional[int]:
+        """Id of an existing tag, without inserting it."""
+        return self._ids.get(normalize_tag(name))
+
+    def names_for(self, db: Session, ids: Iterable[int]) -> List[str]:
+        ids = list(ids or [])
+        if any(tag_id not in self._names for tag_id in ids):
+            self.refresh(db)
+        return [self._names[tag_id] for tag_id in ids if tag_id in self._names]
+
+
+vocabulary = TagVocabulary()
@@ -0,0 +1,7 @@
+"""
+Load-test harness for the Little Chef API.
+
+Run from the backend directory:
+
+    python -m loadtest.run --catalog-sizes 1000,10000 --users 20
+"""
@@ -0,0 +1,93 @@
+import hashlib
+import random
+from typing import List
+
+from sqlalchemy.orm import Session
+
+from app.models import Recipe, SavedRecipe
+from app.models.cooking_session import CookingSession
+from app.services.search import backfill_search_columns
+from app.services.tag_vocabulary import vocabulary
+
+# Every synthetic recipe gets a source_url under this prefix so a run can
+# clear its own catalog without touching scraped data.
+SOURCE_PREFIX = "loadtest://recipe/"
+
+INGREDIENTS = [
+    "all-purpose flour", "white sugar", "butter", "eggs", "milk", "salt",
+    "black pepper", "olive oil", "garlic", "onion", "chicken breast",
+    "ground beef", "tomato sauce", "cheddar cheese", "parmesan cheese",
+    "rice", "pasta", "baking powder", "vanilla extract", "lemon juice",
+]
+
+
+def make_tag_vocabulary(size: int) -> List[str]:
+    return [f"tag-{i:04d}" for i in range(size)]
+
+
+def _zipf_weights(size: int, skew: float) -> List[float]:
+    """Rank-frequency weights so a few tags are very common, like real data."""
+    return [1.0 / (rank ** skew) for rank in range(1, size + 1)]
+
+
+def clear_catalog(db: Session) -> None:
+    """Delete every synthetic recipe and the rows that reference them."""
+    recipe_ids = db.query(Recipe.id).filter(Recipe.source_url.like(f"{SOURCE_PREFIX}%"))
+    db.query(CookingSession).filter(CookingSession.recipe_id.in_(recipe_ids)).delete(synchronize_session=False)
+    db.query(SavedRecipe).filter(SavedRecipe.recipe_id.in_(recipe_ids)).delete(synchronize_session=False)
+    db.query(Recipe).filter(Recipe.source_url.like(f"{SOURCE_PREFIX}%")).delete(synchronize_session=False)
+    db.commit()
+
+
+def seed_catalog(
+    db: Session,
+    size: int,
+    tag_vocabulary_size: int = 200,
+    tags_per_recipe: int = 6,
+    tag_skew: float = 1.1,
+    steps_per_recipe: int = 6,
+    seed: int = 0,
+    batch_size: int = 1000,
+) -> int:
+    """Insert `size` synthetic recipes with Zipf-distributed tags."""
+    rng = random.Random(seed)
+    tag_names = make_tag_vocabulary(tag_vocabulary_size)
+    tag_ids = vocabulary.ids_for(db, tag_names)
+    tag_weights = _zipf_weights(tag_vocabulary_size, tag_skew)
+
+    batch = []
+    for i in range(size):
+        tags = set()
+        while len(tags) < min(tags_per_recipe, tag_vocabulary_size):
+            tags.add(rng.choices(tag_ids, weights=tag_weights, k=1)[0])
+        ingredients = {
+            name: f"{rng.randint(1, 4)} cup"
+            for name in rng.sample(INGREDIENTS, k=rng.randint(4, 10))
+        }
+        steps = [
+            f"Step {n + 1}: mix the ingredients and cook for {rng.randint(2, 30)} minutes at {rng.choice([325, 350, 375, 400])} degrees F."
+            for n in range(steps_per_recipe)
+        ]
+        source_url = f"{SOURCE_PREFIX}{seed}/{i}"
+        batch.append({
+            "title": f"Synthetic Recipe {i}",
+            "ingredients": ingredients,
+            "steps": steps,
+            "source_url": source_url,
+            "images": [None] * 5,
+            "total_time": rng.randint(5, 240),
+            "servings": rng.randint(1, 12),
+            "tag_ids": sorted(tags),
+            "hash": hashlib.sha256(source_url.encode()).hexdigest(),
+        })
+        if len(batch) >= batch_size:
+            db.bulk_insert_mappings(Recipe, batch)
+            db.commit()
+            batch = []
+
+    if batch:
+        db.bulk_insert_mappings(Recipe, batch)
+        db.commit()
+
+    backfill_search_columns(db)
+    return size
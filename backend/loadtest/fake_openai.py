@@ -0,0 +1,69 @@
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+
+STEP_ANALYSIS_RESPONSE = {
+    "actions": [
+        {
+            "type": "TIMER",
+            "duration": 10,
+            "appliance": "STOVE",
+            "label": "Simmer",
+            "description": "Timer for simmering"
+        },
+        {
+            "type": "TEMPERATURE",
+            "appliance": "OVEN",
+            "value": 350,
+            "description": "Preheat oven to 350°F"
+        }
+    ]
+}
+
+CHAT_RESPONSE = {
+    "message": "Keep stirring until the sauce thickens.",
+    "suggested_actions": [
+        {
+            "type": "TIMER",
+            "duration": 5,
+            "appliance": "STOVE",
+            "label": "Stir",
+            "description": "Timer for stirring"
+        }
+    ]
+}
+
+
+class _Completions:
+    def __init__(self, latency_ms: float, jitter_ms: float):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    async def create(self, model, messages, **kwargs):
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+
+        system_prompt = messages[0]["content"]
+        payload = CHAT_RESPONSE if "Little Chef" in system_prompt else STEP_ANALYSIS_RESPONSE
+        message = SimpleNamespace(content=json.dumps(payload))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+class FakeAsyncOpenAI:
+    """Stand-in for `openai.AsyncOpenAI` that answers locally after a simulated delay."""
+
+    latency_ms = 300.0
+    jitter_ms = 200.0
+
+    def __init__(self, api_key=None, **kwargs):
+        self.chat = SimpleNamespace(completions=_Completions(self.latency_ms, self.jitter_ms))
+
+
+def install(latency_ms: float = 300.0, jitter_ms: float = 200.0) -> None:
+    """Replace the OpenAI client used by `AIService` with the local fake."""
+    from app.services import ai_service
+
+    FakeAsyncOpenAI.latency_ms = latency_ms
+    FakeAsyncOpenAI.jitter_ms = jitter_ms
+    ai_service.AsyncOpenAI = FakeAsyncOpenAI
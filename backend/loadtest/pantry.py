@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of pantry search ("what can I make with ...") on the catalog index.
+
+Builds a CatalogIndex from synthetic recipes whose ingredients are drawn with
+Zipf weights from a few hundred names, so staples like salt, oil and pepper
+are in most recipes as in scraped data, then times `CatalogIndex.pantry` for
+random pantries. Only the index lookup is timed; the page of rows a request
+then reads by primary key is not, so no database is needed.
+
+Example:
+
+    python -m loadtest.pantry --catalog-sizes 10000,100000 --queries 500
+"""
+import argparse
+import json
+import random
+import time
+import uuid
+from typing import Dict, List
+
+from app.services.catalog_index import CatalogIndex
+from loadtest.run import percentile
+
+STAPLES = ["salt", "olive oil", "black pepper", "garlic", "onion", "butter", "all-purpose flour", "eggs", "white sugar"]
+QUALIFIERS = ["", "fresh", "dried", "ground", "chopped", "boneless", "smoked", "low-fat", "frozen", "grated"]
+BASES = [
+    "chicken breast", "chicken thighs", "ground beef", "pork chops", "salmon fillet", "shrimp", "tofu",
+    "cheddar cheese", "parmesan cheese", "mozzarella", "heavy cream", "milk", "rice", "pasta", "potatoes",
+    "carrots", "celery", "bell pepper", "tomatoes", "spinach", "mushrooms", "lemon juice", "lime", "ginger",
+    "soy sauce", "honey", "basil", "parsley", "cilantro", "thyme", "paprika", "cumin", "chili powder",
+    "black beans", "chickpeas", "coconut milk", "vanilla extract", "baking powder", "brown sugar", "bread crumbs",
+]
+
+
+def ingredient_names() -> List[str]:
+    """Staples first, then qualified variants, so Zipf weights make staples the most common."""
+    names = list(STAPLES)
+    for qualifier in QUALIFIERS:
+        names.extend(f"{qualifier} {base}".strip() for base in BASES)
+    return names
+
+
+def build_index(size: int, seed: int) -> CatalogIndex:
+    rng = random.Random(seed)
+    names = ingredient_names()
+    weights = [1.0 / rank for rank in range(1, len(names) + 1)]
+    rows = []
+    for i in range(size):
+        ingredients = {name: "1 cup" for name in rng.choices(names, weights=weights, k=rng.randint(6, 14))}
+        rows.append((uuid.UUID(int=i + 1), f"Synthetic Recipe {i}", [], rng.randint(5, 240), rng.randint(1, 12), ingredients))
+    return CatalogIndex.from_rows(rows)
+
+
+def benchmark(size: int, queries: int, seed: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    index = build_index(size, seed)
+    build_s = time.perf_counter() - start
+
+    words = STAPLES + BASES
+    latencies, results = [], []
+    for _ in range(queries):
+        have = rng.sample(words, k=rng.randint(3, 12))
+        max_missing = rng.randint(0, 3)
+        start = time.perf_counter()
+        ordinals, _ = index.pantry(have, max_missing)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(len(ordinals))
+    latencies.sort()
+    return {
+        "recipes": size,
+        "entries": len(index.entry_recipes),
+        "build_s": build_s,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_matches": sum(results) / len(results),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pantry search on the catalog index")
+    parser.add_argument("--catalog-sizes", default="10000,100000", help="Comma-separated catalog sizes")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = [benchmark(int(n), args.queries, args.seed) for n in args.catalog_sizes.split(",")]
+    print(f"{'recipes':>8} {'entries':>9} {'build s':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'matches':>8}")
+    for r in results:
+        print(
+            f"{r['recipes']:>8} {r['entries']:>9} {r['build_s']:>8.1f} {r['p50_ms']:>7.2f} "
+            f"{r['p95_ms']:>7.2f} {r['p99_ms']:>7.2f} {r['mean_matches']:>8.0f}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
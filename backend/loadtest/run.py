@@ -0,0 +1,226 @@
+"""
+Drive realistic swipe and cooking flows against the API and report latency.
+
+Each virtual user repeatedly starts a swipe session, alternates `/next` and
+`/swipe` calls, occasionally opens a cooking session for a liked recipe
+(step actions plus chat), and then cleans up after itself. The app runs
+in-process over ASGI with the OpenAI client replaced by a local fake, so the
+numbers measure our code and database, not the model provider.
+
+Example:
+
+    python -m loadtest.run --catalog-sizes 1000,10000,50000 --users 20 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from loadtest import catalog, fake_openai
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[label] += 1
+            return None
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for label in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[label])
+            result[label] = {
+                "count": len(values),
+                "errors": self.errors[label],
+                "throughput_rps": len(values) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+            }
+        return result
+
+
+async def user_flow(client: httpx.AsyncClient, recorder: Recorder, args, rng: random.Random) -> None:
+    for _ in range(args.sessions_per_user):
+        response = await recorder.call(client, "POST /swipe-sessions/start", "POST", "/swipe-sessions/start")
+        if response is None or response.status_code != 200:
+            continue
+        session_id = response.json()["session_id"]
+
+        liked_recipe_id = None
+        for _ in range(args.swipes):
+            response = await recorder.call(
+                client, "GET /swipe-sessions/{id}/next", "GET", f"/swipe-sessions/{session_id}/next"
+            )
+            if response is None or response.status_code != 200:
+                break
+            body = response.json()
+            if not body["has_more_recipes"]:
+                break
+
+            recipe_id = body["recipe"]["id"]
+            liked = rng.random() < args.like_rate
+            save = liked and rng.random() < args.save_rate
+            await recorder.call(
+                client, "POST /swipe-sessions/{id}/swipe/{recipe_id}", "POST",
+                f"/swipe-sessions/{session_id}/swipe/{recipe_id}",
+                params={"liked": str(liked).lower(), "save": str(save).lower()},
+            )
+            if liked:
+                liked_recipe_id = recipe_id
+            if args.think_ms:
+                await asyncio.sleep(args.think_ms / 1000)
+
+        if liked_recipe_id and rng.random() < args.cook_rate:
+            await cooking_flow(client, recorder, args, liked_recipe_id)
+
+        if rng.random() < args.saved_list_rate:
+            await recorder.call(client, "GET /saved-recipes", "GET", "/saved-recipes/")
+
+        await recorder.call(client, "DELETE /swipe-sessions/{id}", "DELETE", f"/swipe-sessions/{session_id}")
+
+
+async def cooking_flow(client: httpx.AsyncClient, recorder: Recorder, args, recipe_id: str) -> None:
+    response = await recorder.call(
+        client, "POST /cooking-sessions", "POST", "/cooking-sessions/",
+        json={"recipe_id": recipe_id, "current_step": 0},
+    )
+    if response is None or response.status_code != 200:
+        return
+    cooking_id = response.json()["id"]
+
+    for step in range(args.cook_steps):
+        await recorder.call(
+            client, "POST /cooking-sessions/{id}/step_actions", "POST",
+            f"/cooking-sessions/{cooking_id}/step_actions", json={"step_number": step},
+        )
+    for _ in range(args.chat_messages):
+        await recorder.call(
+            client, "POST /cooking-sessions/{id}/chat", "POST",
+            f"/cooking-sessions/{cooking_id}/chat", json={"message": "How do I know when it's done?"},
+        )
+    await recorder.call(client, "GET /cooking-sessions/{id}", "GET", f"/cooking-sessions/{cooking_id}")
+    await recorder.call(client, "DELETE /cooking-sessions/{id}", "DELETE", f"/cooking-sessions/{cooking_id}")
+
+
+async def run_load(app, args) -> Dict[str, Dict[str, float]]:
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*[
+                user_flow(client, recorder, args, random.Random(args.seed + user))
+                for user in range(args.users)
+            ])
+            elapsed = time.perf_counter() - start
+    summary = recorder.summary(elapsed)
+    summary["_total"] = {
+        "elapsed_s": elapsed,
+        "requests": sum(v["count"] for v in summary.values()),
+    }
+    return summary
+
+
+def print_summary(catalog_size: int, summary: Dict[str, Dict[str, float]]) -> None:
+    total = summary["_total"]
+    print(f"\n=== catalog size {catalog_size}: {total['requests']} requests in {total['elapsed_s']:.1f}s ===")
+    print(f"{'endpoint':<48}{'count':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for label, stats in summary.items():
+        if label.startswith("_"):
+            continue
+        print(
+            f"{label:<48}{stats['count']:>8}{stats['errors']:>6}{stats['throughput_rps']:>9.1f}"
+            f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}"
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Little Chef API")
+    parser.add_argument("--catalog-sizes", default="1000", help="Comma-separated catalog sizes to sweep")
+    parser.add_argument("--tag-vocabulary", type=int, default=200, help="Number of distinct tags")
+    parser.add_argument("--tags-per-recipe", type=int, default=6)
+    parser.add_argument("--tag-skew", type=float, default=1.1, help="Zipf exponent of the tag distribution")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--sessions-per-user", type=int, default=3)
+    parser.add_argument("--swipes", type=int, default=30, help="Swipes per session")
+    parser.add_argument("--like-rate", type=float, default=0.4)
+    parser.add_argument("--save-rate", type=float, default=0.2)
+    parser.add_argument("--cook-rate", type=float, default=0.3, help="Fraction of sessions that start cooking")
+    parser.add_argument("--cook-steps", type=int, default=3)
+    parser.add_argument("--chat-messages", type=int, default=2)
+    parser.add_argument("--saved-list-rate", type=float, default=0.5)
+    parser.add_argument("--think-ms", type=float, default=0.0)
+    parser.add_argument("--ai-latency-ms", type=float, default=300.0)
+    parser.add_argument("--ai-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-catalog", action="store_true", help="Do not delete the synthetic catalog afterwards")
+    parser.add_argument("--json", help="Write the results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    fake_openai.install(args.ai_latency_ms, args.ai_jitter_ms)
+
+    from app.core.database import SessionLocal
+    from app.main import app
+
+    results = {}
+    for size in [int(s) for s in args.catalog_sizes.split(",") if s]:
+        db = SessionLocal()
+        try:
+            catalog.clear_catalog(db)
+            catalog.seed_catalog(
+                db, size,
+                tag_vocabulary_size=args.tag_vocabulary,
+                tags_per_recipe=args.tags_per_recipe,
+                tag_skew=args.tag_skew,
+                seed=args.seed,
+            )
+        finally:
+            db.close()
+
+        summary = asyncio.run(run_load(app, args))
+        print_summary(size, summary)
+        results[size] = summary
+
+    if not args.keep_catalog:
+        db = SessionLocal()
+        try:
+            catalog.clear_catalog(db)
+        finally:
+            db.close()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Micro-benchmark of the recipe response serialization paths.
+
+Compares, per response, the default FastAPI path (validate the hand-built
+dicts against the response_model, dump them to JSON-compatible Python, then
+json.dumps) with the fast path (orjson straight from the trusted dicts), and
+reports the bytes on the wire uncompressed, gzipped and brotli-compressed.
+Payloads are synthetic recipes shaped like scraped ones, so no database is
+needed.
+
+Example:
+
+    python -m loadtest.serialization --recipes 1,50 --iterations 500
+"""
+import argparse
+import json
+import random
+import string
+import time
+import uuid
+from typing import Callable, Dict, List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.core.serialization import compress
+from app.schemas.recipe import Recipe as RecipeSchema
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(count))
+
+
+def fake_recipe(rng: random.Random) -> dict:
+    return {
+        "id": uuid.UUID(int=rng.getrandbits(128)),
+        "title": _words(rng, 4).title(),
+        "ingredients": {_words(rng, 3): f"{rng.randint(1, 4)} cups" for _ in range(rng.randint(6, 14))},
+        "steps": [_words(rng, rng.randint(15, 45)) + "." for _ in range(rng.randint(4, 9))],
+        "source_url": f"https://www.allrecipes.com/recipe/{rng.randint(1, 10 ** 6)}/{_words(rng, 1)}/",
+        "images": [f"https://www.allrecipes.com/thmb/{_words(rng, 1)}.jpg" for _ in range(rng.randint(1, 5))],
+        "total_time": rng.randint(10, 120),
+        "servings": rng.randint(1, 8),
+        "tags": _words(rng, rng.randint(2, 6)).split(),
+        "hash": "%064x" % rng.getrandbits(256),
+        "is_saved": True,
+    }
+
+
+_adapter = TypeAdapter(List[RecipeSchema])
+
+
+def default_path(payload: List[dict]) -> bytes:
+    # What FastAPI does for a response_model route returning plain dicts
+    validated = _adapter.validate_python(payload)
+    content = _adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def fast_path(payload: List[dict]) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+def time_per_call(func: Callable[[], bytes], iterations: int) -> float:
+    func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def benchmark(recipes: int, iterations: int, seed: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    payload = [fake_recipe(rng) for _ in range(recipes)]
+    body = fast_path(payload)
+    assert json.loads(body) == json.loads(default_path(payload)), "paths disagree"
+    return {
+        "recipes": recipes,
+        "default_us": time_per_call(lambda: default_path(payload), iterations),
+        "fast_us": time_per_call(lambda: fast_path(payload), iterations),
+        "gzip_us": time_per_call(lambda: compress(body, "gzip"), iterations),
+        "brotli_us": time_per_call(lambda: compress(body, "br"), iterations),
+        "bytes": len(body),
+        "gzip_bytes": len(compress(body, "gzip")),
+        "brotli_bytes": len(compress(body, "br")),
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark recipe response serialization")
+    parser.add_argument("--recipes", default="1,20,100", help="Comma-separated recipes per response")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = [benchmark(int(n), args.iterations, args.seed) for n in args.recipes.split(",")]
+    print(f"{'recipes':>7} {'default us':>11} {'fast us':>9} {'speedup':>8} {'bytes':>8} {'gzip':>7} {'br':>7} {'gzip us':>8} {'br us':>7}")
+    for r in results:
+        print(
+            f"{r['recipes']:>7} {r['default_us']:>11.0f} {r['fast_us']:>9.0f} {r['default_us'] / r['fast_us']:>7.1f}x "
+            f"{r['bytes']:>8} {r['gzip_bytes']:>7} {r['brotli_bytes']:>7} {r['gzip_us']:>8.0f} {r['brotli_us']:>7.0f}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
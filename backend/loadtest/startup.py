@@ -0,0 +1,112 @@
+"""
+Measure how long an API worker takes to import the app and how much memory it holds.
+
+Each repetition imports `app.main` in a fresh interpreter, as a new worker
+would, and reports wall time, peak RSS, live threads and whether any of the
+modules that must stay out of API workers (the scraper stack) were loaded.
+Importing the app must not touch the database, so this runs without one.
+
+Example:
+
+    python -m loadtest.startup --repeat 5 --json startup.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Loaded only when a crawl is triggered; importing them at startup is a regression
+HEAVY_MODULES = ["scrapy", "twisted", "crochet"]
+
+_PROBE = """
+import json, resource, sys, threading, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss_kb //= 1024
+print(json.dumps({
+    "import_ms": elapsed * 1000,
+    "rss_mb": rss_kb / 1024,
+    "threads": threading.active_count(),
+    "modules": len(sys.modules),
+    "heavy_loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_once() -> Dict:
+    result = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int) -> List[Dict]:
+    """Top-level packages by cumulative import time, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        capture_output=True, text=True, check=True
+    )
+    packages: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            cumulative_us = int(cumulative.strip())
+        except ValueError:
+            continue  # header line
+        # The outermost import of a package has the largest cumulative time of its modules
+        package = name.strip().split(".")[0]
+        if package != "app":
+            packages[package] = max(packages.get(package, 0), cumulative_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return [{"module": module, "cumulative_ms": us / 1000} for module, us in ranked]
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark API worker startup")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level imports to list")
+    parser.add_argument("--json", help="Write the results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    runs = [measure_once() for _ in range(args.repeat)]
+    import_ms = sorted(run["import_ms"] for run in runs)
+    summary = {
+        "repeat": args.repeat,
+        "import_ms_median": statistics.median(import_ms),
+        "import_ms_min": import_ms[0],
+        "import_ms_max": import_ms[-1],
+        "rss_mb_median": statistics.median(run["rss_mb"] for run in runs),
+        "threads": runs[-1]["threads"],
+        "modules": runs[-1]["modules"],
+        "heavy_loaded": runs[-1]["heavy_loaded"],
+        "slowest_imports": slowest_imports(args.top),
+    }
+
+    print(
+        f"import {summary['import_ms_median']:.0f} ms median "
+        f"({summary['import_ms_min']:.0f}-{summary['import_ms_max']:.0f}), "
+        f"RSS {summary['rss_mb_median']:.1f} MB, {summary['threads']} threads, {summary['modules']} modules"
+    )
+    for entry in summary["slowest_imports"]:
+        print(f"  {entry['module']:<24} {entry['cumulative_ms']:8.1f} ms")
+    if summary["heavy_loaded"]:
+        print(f"WARNING: scraper modules loaded at startup: {', '.join(summary['heavy_loaded'])}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if summary["heavy_loaded"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+
+# Settings are required at import time; these tests never connect to anything
+for name, value in {
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "OPENAI_API_KEY": "test",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,189 @@
+import asyncio
+import itertools
+
+import pytest
+
+from app.core.concurrency import AdmissionController, AdmissionRejected, SingleFlight
+
+_names = itertools.count()
+
+
+def make_controller(max_concurrency=1, queue_limits=None, timeout=5.0) -> AdmissionController:
+    # Metrics are registered by name, so every controller gets its own
+    return AdmissionController(f"test_admission_{next(_names)}", max_concurrency, queue_limits or {0: 10, 1: 10, 2: 10}, timeout)
+
+
+async def hold(controller: AdmissionController, release: asyncio.Event, priority: int = 0) -> None:
+    async with controller.admit(priority):
+        await release.wait()
+
+
+def test_waiters_are_admitted_by_priority_then_arrival():
+    async def scenario():
+        controller = make_controller()
+        release = asyncio.Event()
+        admitted = []
+
+        async def waiter(name, priority):
+            async with controller.admit(priority):
+                admitted.append(name)
+
+        holder = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0)
+        waiters = []
+        for name, priority in [("low", 2), ("normal", 1), ("high-1", 0), ("high-2", 0)]:
+            waiters.append(asyncio.create_task(waiter(name, priority)))
+            await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return admitted, controller.in_flight
+
+    admitted, in_flight = asyncio.run(scenario())
+    assert admitted == ["high-1", "high-2", "normal", "low"]
+    assert in_flight == 0
+
+
+def test_full_queue_rejects_with_429_without_waiting():
+    async def scenario():
+        controller = make_controller(queue_limits={0: 1, 1: 1})
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(hold(controller, release, priority=0))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit(0):
+                pass
+        # Other priorities have queues of their own
+        other = asyncio.create_task(hold(controller, release, priority=1))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, queued, other)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+
+
+def test_waiting_past_the_timeout_rejects_with_503():
+    async def scenario():
+        controller = make_controller(timeout=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit(0):
+                pass
+        waiting = sum(controller._waiting.values())
+        release.set()
+        await holder
+        return rejected.value, waiting, controller.in_flight
+
+    rejected, waiting, in_flight = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert waiting == 0
+    assert in_flight == 0
+
+
+def test_retry_after_grows_with_the_queue():
+    async def scenario():
+        controller = make_controller()
+        release = asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, release))]
+        await asyncio.sleep(0)
+        empty = controller.retry_after()
+        for _ in range(4):
+            tasks.append(asyncio.create_task(hold(controller, release)))
+        await asyncio.sleep(0)
+        busy = controller.retry_after()
+        release.set()
+        await asyncio.gather(*tasks)
+        return empty, busy
+
+    empty, busy = asyncio.run(scenario())
+    assert busy > empty >= 1
+
+
+def test_waiter_cancelled_after_being_granted_hands_the_slot_on():
+    async def scenario():
+        controller = make_controller()
+        release = asyncio.Event()
+        admitted = []
+
+        async def waiter(name):
+            async with controller.admit(0):
+                admitted.append(name)
+
+        holder = asyncio.create_task(hold(controller, release))
+        await asyncio.sleep(0)
+        first = asyncio.create_task(waiter("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(waiter("second"))
+        await asyncio.sleep(0)
+
+        # The holder leaves and grants its slot to `first`, which is
+        # cancelled before it gets to run
+        release.set()
+        await asyncio.sleep(0)
+        assert len(controller._waiters) == 1, "slot was not handed to the first waiter yet"
+        first.cancel()
+
+        results = await asyncio.gather(holder, first, second, return_exceptions=True)
+        return admitted, results[1], controller.in_flight
+
+    admitted, first_result, in_flight = asyncio.run(scenario())
+    assert isinstance(first_result, asyncio.CancelledError)
+    assert admitted == ["second"]
+    assert in_flight == 0
+
+
+def test_single_flight_runs_concurrent_calls_once():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        gate = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return "result"
+
+        callers = [asyncio.create_task(flight.do("key", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        inflight = "key" in flight
+        gate.set()
+        results = await asyncio.gather(*callers)
+        await asyncio.sleep(0)
+        return calls, results, inflight, len(flight)
+
+    calls, results, inflight, remaining = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["result"] * 5
+    assert inflight
+    assert remaining == 0
+
+
+def test_single_flight_survives_a_cancelled_caller():
+    async def scenario():
+        flight = SingleFlight()
+        gate = asyncio.Event()
+
+        async def work():
+            await gate.wait()
+            return 42
+
+        impatient = asyncio.create_task(flight.do("key", work))
+        patient = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        await asyncio.sleep(0)
+        gate.set()
+        return await patient, impatient.cancelled()
+
+    result, cancelled = asyncio.run(scenario())
+    assert result == 42
+    assert cancelled
@@ -0,0 +1,42 @@
+from app.services import dedup
+
+STEPS = [
+    "Preheat the oven to 350 degrees and grease a loaf pan.",
+    "Mash the bananas, then stir in the melted butter, sugar, egg and vanilla.",
+    "Fold in the flour and baking soda and bake for one hour.",
+]
+INGREDIENTS = {"ripe bananas": "3", "butter": "1/3 cup", "white sugar": "3/4 cup", "egg": "1", "all-purpose flour": "1 1/2 cups"}
+
+
+def test_shingles_ignore_formatting_and_ingredient_order():
+    reordered = {name.upper() + "  ": amount for name, amount in reversed(INGREDIENTS.items())}
+    assert dedup.shingles(INGREDIENTS, STEPS) == dedup.shingles(reordered, [step.lower() for step in STEPS])
+
+
+def test_near_duplicates_score_above_the_threshold():
+    original = dedup.recipe_signature(INGREDIENTS, STEPS)
+    tweaked = dedup.recipe_signature(INGREDIENTS, STEPS[:-1] + ["Fold in the flour and baking soda and bake for an hour."])
+    assert dedup.similarity(original, tweaked) >= dedup.DUPLICATE_THRESHOLD
+
+
+def test_different_recipes_score_below_the_threshold():
+    banana_bread = dedup.recipe_signature(INGREDIENTS, STEPS)
+    salad = dedup.recipe_signature(
+        {"romaine lettuce": "1 head", "parmesan cheese": "1/2 cup", "croutons": "1 cup"},
+        ["Tear the lettuce into bite-size pieces.", "Toss with the dressing, cheese and croutons."],
+    )
+    assert dedup.similarity(banana_bread, salad) < dedup.DUPLICATE_THRESHOLD
+
+
+def test_identical_signatures_share_every_bucket():
+    signature = dedup.recipe_signature(INGREDIENTS, STEPS)
+    buckets = dedup.band_buckets(signature)
+    assert len(buckets) == dedup.BANDS
+    assert buckets == dedup.band_buckets(dedup.recipe_signature(dict(INGREDIENTS), list(STEPS)))
+
+
+def test_recipes_without_shingles_have_no_signature():
+    assert dedup.recipe_signature({}, []) is None
+    assert dedup.recipe_signature({"-": ""}, ["..."]) is None
+    # Never looked up, so they cannot all merge into one another
+    assert dedup.find_duplicate(None, None) is None
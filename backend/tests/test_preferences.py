@@ -0,0 +1,48 @@
+import pytest
+
+from app.services.preferences import DECAY, MAX_TRACKED_TAGS, TagPreferences
+
+
+def test_packed_round_trip():
+    preferences = TagPreferences()
+    preferences.update([3, 7], 1.0)
+    preferences.update([7, 11], -1.0)
+    restored = TagPreferences.loads(preferences.dumps())
+    assert restored.weights() == pytest.approx(preferences.weights(), rel=1e-6)
+
+
+def test_empty_and_missing_data_load_as_no_preferences():
+    assert TagPreferences.loads(None).weights() == {}
+    assert TagPreferences.loads(TagPreferences().dumps()).weights() == {}
+
+
+def test_earlier_swipes_decay():
+    preferences = TagPreferences()
+    preferences.update([1], 1.0)
+    preferences.update([2], 1.0)
+    weights = preferences.weights()
+    assert weights[2] == pytest.approx(1.0)
+    assert weights[1] == pytest.approx(DECAY)
+
+
+def test_dense_table_is_indexed_by_tag_id():
+    preferences = TagPreferences()
+    preferences.update([2], 1.0)
+    assert preferences.dense() == pytest.approx([0.0, 0.0, 1.0])
+
+
+def test_only_the_strongest_tags_are_kept():
+    preferences = TagPreferences()
+    preferences.update(range(MAX_TRACKED_TAGS), 1.0)
+    preferences.update([MAX_TRACKED_TAGS], 5.0)
+    weights = preferences.weights()
+    assert len(weights) == MAX_TRACKED_TAGS
+    assert MAX_TRACKED_TAGS in weights
+
+
+def test_long_sessions_stay_finite():
+    preferences = TagPreferences()
+    for _ in range(1000):
+        preferences.update([1], 1.0)
+    restored = TagPreferences.loads(preferences.dumps())
+    assert restored.weights()[1] == pytest.approx(1 / (1 - DECAY), rel=1e-3)
@@ -0,0 +1,23 @@
+import pytest
+
+from app.core.serialization import _preferred_encoding
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("br", "br"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip;q=0.8", "gzip"),
+    ("br;q=0.8, gzip;q=0.8", "br"),
+    ("GZIP;q=1.0", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+    ("*;q=0.5, br;q=0.1", "gzip"),
+    ("*, br;q=0", "gzip"),
+    ("br;q=bogus, gzip;q=0.1", "gzip"),
+])
+def test_preferred_encoding(accept_encoding, expected):
+    assert _preferred_encoding(accept_encoding) == expected